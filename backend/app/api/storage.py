@@ -5,6 +5,7 @@ from __future__ import annotations
 import os
 
 from fastapi import APIRouter, Body, File, Form, HTTPException, Query, UploadFile, Response
+from fastapi.concurrency import run_in_threadpool
 
 from ..models.schemas import CameraPreset, SaveCameraPresetRequest
 from ..services.camera_presets import delete_camera_preset, list_camera_presets, upsert_camera_preset
@@ -175,7 +176,8 @@ async def api_upload_screenshot(
     file: UploadFile = File(...),
 ) -> dict:
     try:
-        saved = save_screenshot(file)
+        # Copying the upload to disk blocks; keep it off the event loop.
+        saved = await run_in_threadpool(save_screenshot, file)
     except ValueError as exc:
         if request_id:
             await screenshot_request_queue.mark_failed(request_id, str(exc), processed_by=client_id)
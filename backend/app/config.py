@@ -48,6 +48,8 @@ class Settings:
     )
     # Resize input images before sending to model to reduce flaky errors due to size limits
     image_size: int = int(os.getenv("IMAGE_SIZE", "1024"))
+    # fsync generated files before returning (durability at the cost of latency)
+    fsync_outputs: bool = os.getenv("FSYNC_OUTPUTS", "false").lower() in {"1", "true", "yes"}
 
     # Embeddings / Vector store
     google_text_embedding_model: str = os.getenv("GOOGLE_EMBEDDING_MODEL", "text-embedding-004")
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
@@ -17,8 +18,18 @@ from .api import (
     storage_router,
 )
 from .config import settings
+from .services.embedding_cache import close_cache as close_embedding_cache
+from .utils.http_client import close_http_client
 
-app = FastAPI(title="Image Loop Synthesizer Backend", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    close_http_client()
+    close_embedding_cache()
+
+
+app = FastAPI(title="Image Loop Synthesizer Backend", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
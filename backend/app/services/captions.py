@@ -2,38 +2,21 @@
 
 from __future__ import annotations
 
-from typing import Dict, Optional
-
 from .timed_text import TimedTextManager
 
 
-class CaptionManager:
+class CaptionManager(TimedTextManager):
     def __init__(self) -> None:
-        self._manager = TimedTextManager(
+        super().__init__(
             default_duration=None,
             empty_error_message="caption text cannot be empty",
         )
 
-    async def set_caption(
-        self,
-        text: str,
-        *,
-        language: Optional[str] = None,
-        duration_seconds: Optional[float] = None,
-        target_client_id: Optional[str] = None,
-    ) -> Dict[str, Any]:
-        return await self._manager.set_text(
-            text,
-            language=language,
-            duration_seconds=duration_seconds,
-            target_client_id=target_client_id,
-        )
-
-    async def clear_caption(self, target_client_id: Optional[str] = None) -> None:
-        await self._manager.clear_text(target_client_id)
-
-    async def get_caption(self, client_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
-        return await self._manager.get_text(client_id)
+    # Caption-named entry points are the TimedTextManager methods themselves,
+    # not wrappers, so each call is a single coroutine.
+    set_caption = TimedTextManager.set_text
+    clear_caption = TimedTextManager.clear_text
+    get_caption = TimedTextManager.get_text
 
 
 caption_manager = CaptionManager()
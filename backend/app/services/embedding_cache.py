@@ -0,0 +1,155 @@
+"""Persistent embedding cache keyed by (model key, SHA-256 of the image bytes).
+
+The model key is chosen by the caller and should name everything that shapes
+the vector (for image search: vision model, embedding model and a pipeline
+version), so changing any of them misses instead of returning stale vectors.
+
+Embeddings are stored as float32 blobs in a small SQLite database next to the
+Chroma data (``embedding_cache.sqlite3`` under ``settings.chroma_db_path``),
+so the same image bytes are only sent to the embedding API once, regardless
+of the path they were found under. Cache failures are never fatal: a lookup
+error behaves like a miss and a failed write is ignored.
+
+The same database also keeps a basename -> 64-bit perceptual hash table for
+indexed offspring images, used to find near-duplicate query images whose
+bytes differ (re-saved, EXIF stripped) so their stored vector can be reused.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..config import settings
+
+
+CACHE_FILENAME = "embedding_cache.sqlite3"
+
+_conn: sqlite3.Connection | None = None
+_conn_path: str | None = None
+# basename -> perceptual hash，首次查詢時自資料庫載入並於寫入時同步更新
+_hash_index: Dict[str, int] | None = None
+# 索引器會從多個執行緒同時讀寫，共用連線需以鎖保護
+_lock = threading.Lock()
+
+
+def _get_conn() -> sqlite3.Connection:
+    global _conn, _conn_path, _hash_index
+    db_path = str(Path(settings.chroma_db_path) / CACHE_FILENAME)
+    if _conn is not None and _conn_path == db_path:
+        return _conn
+    if _conn is not None:
+        _conn.close()
+        _conn = None
+    _hash_index = None
+    Path(settings.chroma_db_path).mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS embedding_cache ("
+        " model TEXT NOT NULL,"
+        " sha256 TEXT NOT NULL,"
+        " vec BLOB NOT NULL,"
+        " PRIMARY KEY (model, sha256)"
+        ") WITHOUT ROWID"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS image_hashes ("
+        " basename TEXT PRIMARY KEY,"
+        " phash INTEGER NOT NULL"
+        ")"
+    )
+    conn.commit()
+    _conn, _conn_path = conn, db_path
+    return conn
+
+
+def get_embedding(model: str, digest: str) -> Optional[List[float]]:
+    """Return the cached vector for (model, digest), or None on a miss."""
+    try:
+        with _lock:
+            row = _get_conn().execute(
+                "SELECT vec FROM embedding_cache WHERE model = ? AND sha256 = ?",
+                (model, digest),
+            ).fetchone()
+    except sqlite3.Error:
+        return None
+    if row is None:
+        return None
+    return np.frombuffer(row[0], dtype=np.float32).tolist()
+
+
+def put_embedding(model: str, digest: str, vec: Sequence[float]) -> None:
+    """Store a vector for (model, digest), replacing any previous entry."""
+    blob = np.asarray(vec, dtype=np.float32).tobytes()
+    try:
+        with _lock:
+            conn = _get_conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO embedding_cache (model, sha256, vec) VALUES (?, ?, ?)",
+                (model, digest, blob),
+            )
+            conn.commit()
+    except sqlite3.Error:
+        pass
+
+
+def _to_signed64(value: int) -> int:
+    # SQLite INTEGER 為有號 64 位元
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _load_hash_index(conn: sqlite3.Connection) -> Dict[str, int]:
+    global _hash_index
+    if _hash_index is None:
+        rows = conn.execute("SELECT basename, phash FROM image_hashes").fetchall()
+        _hash_index = {name: value & 0xFFFFFFFFFFFFFFFF for name, value in rows}
+    return _hash_index
+
+
+def put_image_hash(basename: str, phash: int) -> None:
+    """Record the perceptual hash of an indexed image."""
+    try:
+        with _lock:
+            conn = _get_conn()
+            index = _load_hash_index(conn)
+            conn.execute(
+                "INSERT OR REPLACE INTO image_hashes (basename, phash) VALUES (?, ?)",
+                (basename, _to_signed64(phash)),
+            )
+            conn.commit()
+            index[basename] = phash
+    except sqlite3.Error:
+        pass
+
+
+def find_similar_image(phash: int, max_distance: int) -> Optional[Tuple[str, int]]:
+    """Return (basename, hamming distance) of the closest indexed image within max_distance."""
+    try:
+        with _lock:
+            index = _load_hash_index(_get_conn())
+            best: Optional[Tuple[str, int]] = None
+            for name, value in index.items():
+                distance = (phash ^ value).bit_count()
+                if distance <= max_distance and (best is None or distance < best[1]):
+                    best = (name, distance)
+                    if distance == 0:
+                        break
+    except sqlite3.Error:
+        return None
+    return best
+
+
+def close_cache() -> None:
+    """Close the shared SQLite connection (reopened lazily on next use)."""
+    global _conn, _conn_path, _hash_index
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+        _conn = None
+        _conn_path = None
+        _hash_index = None
@@ -1,36 +1,112 @@
 import base64
+import binascii
+import logging
 import os
 import random
+import stat
+import threading
 import time
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from io import BytesIO
-from typing import Callable, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 from PIL import Image, ImageOps
 
+try:
+    import pyvips  # Optional: fused decode/resize/encode via libvips
+except Exception:  # pragma: no cover - depends on libvips being installed
+    pyvips = None
+
 from ..config import settings
-from ..utils.fs import ensure_dirs
+from ..utils.fs import ensure_dirs, fsync_dir, fsync_file, listing_is_settled, write_file_bytes
 from ..utils.metadata import write_metadata
 from ..utils.gemini_client import get_gemini_client
 
 TimestampFactory = Callable[[], datetime]
 FilenameBuilder = Callable[[str, datetime], str]
 
+logger = logging.getLogger(__name__)
+
+# Large PNG outputs spend most of their save time in zlib deflate; a light
+# compression level trades a slightly bigger file for a much faster encode.
+_LARGE_PNG_PIXELS = 1_000_000
+_LARGE_PNG_COMPRESS_LEVEL = 1
+
+_REDUCING_GAP = 2.0
+# Bound used for the unconstrained axis when only width or height is requested.
+_VIPS_UNBOUNDED = 10_000_000
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_JPEG_SIGNATURE = b"\xff\xd8"
+
+_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB")
+_IMAGE_EXTS = (".png", ".jpg", ".jpeg")
+_EXIF_ORIENTATION = 0x0112
+
+
+_prepare_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="gemini-prepare")
+
+# pool_dir -> (dir st_mtime_ns, scan time in ns, image paths)
+_pool_cache: Dict[str, Tuple[int, int, List[str]]] = {}
+# Resamples when a sampled parent disappears before it is opened.
+_POOL_SAMPLE_ATTEMPTS = 3
+_pool_cache_lock = threading.Lock()
+
+
+def _genes_pool_dirs() -> List[str]:
+    return getattr(settings, "genes_pool_dirs", [settings.genes_pool_dir])
+
+
+def _list_pool_dir(pool_dir: str) -> Optional[List[str]]:
+    """Return image paths in pool_dir, or None if it is not a directory.
+
+    Listings are cached per directory and reused while its mtime is unchanged
+    (adding, removing or renaming files bumps the directory mtime) and the scan
+    happened well after that mtime, so same-tick changes are not missed.
+    """
+    try:
+        st = os.stat(pool_dir)
+    except OSError:
+        return None
+    if not stat.S_ISDIR(st.st_mode):
+        return None
+    cached = _pool_cache.get(pool_dir)
+    if cached is not None and cached[0] == st.st_mtime_ns and listing_is_settled(cached[0], cached[1]):
+        return cached[2]
+
+    scanned_at = time.time_ns()
+    paths: List[str] = []
+    # scandir serves name/type from readdir, avoiding a stat per entry.
+    with os.scandir(pool_dir) as it:
+        for entry in it:
+            if entry.name.lower().endswith(_IMAGE_EXTS) and entry.is_file():
+                paths.append(entry.path)
+    with _pool_cache_lock:
+        _pool_cache[pool_dir] = (st.st_mtime_ns, scanned_at, paths)
+    return paths
+
+
+def _forget_pool_listing(pool_dir: str) -> None:
+    with _pool_cache_lock:
+        _pool_cache.pop(pool_dir, None)
+
+
 def _pick_images_from_genes_pool(count: int) -> List[str]:
     if count < 2:
         raise ValueError("融合張數必須 >= 2")
 
-    pool_dirs: List[str] = getattr(settings, "genes_pool_dirs", [settings.genes_pool_dir])
+    pool_dirs = _genes_pool_dirs()
 
     all_candidates: List[str] = []
     existing_dirs: List[str] = []
     for pool_dir in pool_dirs:
-        if not os.path.isdir(pool_dir):
+        listing = _list_pool_dir(pool_dir)
+        if listing is None:
             continue
         existing_dirs.append(pool_dir)
-        for f in os.listdir(pool_dir):
-            if f.lower().endswith((".png", ".jpg", ".jpeg")):
-                all_candidates.append(os.path.join(pool_dir, f))
+        all_candidates.extend(listing)
 
     if not existing_dirs:
         raise ValueError(
@@ -43,19 +119,24 @@ def _pick_images_from_genes_pool(count: int) -> List[str]:
     return random.sample(all_candidates, count)
 
 
-def _read_image(path: str) -> Image.Image:
-    return Image.open(path).convert("RGBA")
-
-
 def _open_prepared_image(path: str) -> Image.Image:
     # Load, auto-orient, convert to RGB, and resize to max dimension settings.image_size
-    img = Image.open(path)
-    img = ImageOps.exif_transpose(img)
+    target = max(256, int(settings.image_size))
+    with Image.open(path) as img:
+        if img.format == "JPEG":
+            # Let libjpeg decode at 1/2..1/8 scale (never below target) before any pixel access.
+            img.draft("RGB", (target, target))
+        # Decode now (bounded by draft and Image.MAX_IMAGE_PIXELS) so the file
+        # handle is released before the slow Gemini call rather than held lazily.
+        img.load()
+    # exif_transpose copies the full image even when there is nothing to rotate,
+    # so only call it when an orientation other than "normal" is present.
+    if img.getexif().get(_EXIF_ORIENTATION, 1) != 1:
+        img = ImageOps.exif_transpose(img)
     if img.mode not in ("RGB", "RGBA"):
         img = img.convert("RGB")
     # Resize in-place with aspect ratio preserved
     max_side = max(img.size)
-    target = max(256, int(settings.image_size))
     if max_side > target:
         img.thumbnail((target, target), Image.Resampling.LANCZOS)
     return img
@@ -66,24 +147,101 @@ def _safe_size(path: str) -> str:
         n = os.path.getsize(path)
     except Exception:
         return "?"
-    units = [(1<<30, "GB"), (1<<20, "MB"), (1<<10, "KB")]
-    for div, name in units:
-        if n >= div:
-            return f"{n/div:.2f}{name}"
-    return f"{n}B"
+    # bit_length picks the 1024-power directly instead of scanning a unit table.
+    idx = min(max(0, (n.bit_length() - 1) // 10), len(_SIZE_UNITS) - 1)
+    if not idx:
+        return f"{n}B"
+    return f"{n / (1 << (idx * 10)):.2f}{_SIZE_UNITS[idx]}"
 
 
-def _format_input_diagnostics(inputs: List[dict]) -> str:
+@dataclass
+class InputDetails:
+    """Parallel per-parent diagnostics; dict records are only built for metadata."""
+
+    paths: List[str] = field(default_factory=list)
+    names: List[str] = field(default_factory=list)
+    sizes: List[str] = field(default_factory=list)
+    dims: List[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def to_records(self) -> List[dict]:
+        return [
+            {"path": path, "name": name, "file_size": size, "dimensions": dim}
+            for path, name, size, dim in zip(self.paths, self.names, self.sizes, self.dims)
+        ]
+
+
+def _format_input_diagnostics(inputs: InputDetails) -> str:
     details = ", ".join(
-        f"{item['name']}[{item['dimensions']}, {item['file_size']}]" for item in inputs
+        f"{n}[{d}, {s}]" for n, d, s in zip(inputs.names, inputs.dims, inputs.sizes)
     )
     return f" inputs=({len(inputs)} images); details=[{details}]"
 
 
+def _extract_inline_data(part) -> bytes | str | None:
+    # SDK parts expose either snake_case or camelCase inline payloads; stop at the first hit.
+    inline = getattr(part, "inline_data", None)
+    data = getattr(inline, "data", None) if inline is not None else None
+    if data is None:
+        camel_inline = getattr(part, "inlineData", None)
+        data = getattr(camel_inline, "data", None) if camel_inline is not None else None
+    return data
+
+
+def _coerce_image_bytes(data: bytes | bytearray | memoryview | str) -> bytes:
+    match data:
+        case bytes():
+            return data
+        case str():
+            return base64.b64decode(data, validate=True)
+        case memoryview():
+            return data.tobytes()
+        case bytearray():
+            return bytes(data)
+    raise TypeError(f"unsupported inline_data type: {type(data).__name__}")
+
+
+def _lanczos_resize(img: Image.Image, size: Tuple[int, int]) -> Image.Image:
+    # For >=4x downscales Pillow box-reduces by an integer factor first and
+    # only runs LANCZOS for the final step (same as thumbnail()'s default).
+    return img.resize(size, Image.Resampling.LANCZOS, reducing_gap=_REDUCING_GAP)
+
+
+def _contain_size(size: Tuple[int, int], box: Tuple[int, int]) -> Tuple[int, int]:
+    # Same rounding as ImageOps.contain so fit-mode output sizes stay identical.
+    src_w, src_h = size
+    w, h = box
+    im_ratio = src_w / src_h
+    dest_ratio = w / h
+    if im_ratio > dest_ratio:
+        return w, max(1, round(src_h / src_w * w))
+    if im_ratio < dest_ratio:
+        return max(1, round(src_w / src_h * h)), h
+    return w, h
+
+
+def _normalize_format(output_format: Optional[str]) -> str:
+    fmt = (output_format or "png").lower()
+    return "jpeg" if fmt == "jpg" else fmt
+
+
+def _sniff_image_format(data: bytes) -> Optional[str]:
+    if data.startswith(_PNG_SIGNATURE):
+        return "png"
+    if data.startswith(_JPEG_SIGNATURE):
+        return "jpeg"
+    return None
+
+
 def _default_filename_builder(fmt: str, timestamp: datetime) -> str:
-    base = timestamp.strftime("%Y%m%d_%H%M%S")
-    suffix = int(time.time() * 1000) % 1000
-    return f"offspring_{base}_{suffix:03d}.{fmt}"
+    # Single clock read: the millisecond suffix comes from the same timestamp.
+    t = timestamp
+    return (
+        f"offspring_{t.year:04d}{t.month:02d}{t.day:02d}_"
+        f"{t.hour:02d}{t.minute:02d}{t.second:02d}_{t.microsecond // 1000:03d}.{fmt}"
+    )
 
 
 class GeminiImageGenerator:
@@ -122,20 +280,41 @@ class GeminiImageGenerator:
             raise ValueError("父圖至少需要 2 張")
 
         images, input_details = self._prepare_inputs(parent_paths)
-        generated_image = self._call_gemini(prompt, images, input_details)
-        resized = self._resize_image(
-            generated_image,
-            output_format=output_format,
-            output_width=output_width,
-            output_height=output_height,
-            output_max_side=output_max_side,
-            resize_mode=resize_mode,
-        )
-        output_path, fmt, width, height = self._write_output(
-            resized,
-            output_format=output_format,
-            input_details=input_details,
-        )
+        image_bytes = self._request_image_bytes(prompt, images, input_details)
+        needs_resize = bool(output_width or output_height or output_max_side)
+        output: Optional[Tuple[str, str, int, int]] = None
+        if not needs_resize and _sniff_image_format(image_bytes) == _normalize_format(output_format):
+            # Model already returned the requested encoding; store it as-is.
+            output = self._write_output_bytes(
+                image_bytes,
+                output_format=output_format,
+                input_details=input_details,
+            )
+        elif needs_resize:
+            output = self._write_output_vips(
+                image_bytes,
+                output_format=output_format,
+                output_width=output_width,
+                output_height=output_height,
+                output_max_side=output_max_side,
+                resize_mode=resize_mode,
+            )
+        if output is None:
+            generated_image = self._decode_image(image_bytes, input_details)
+            resized = self._resize_image(
+                generated_image,
+                output_format=output_format,
+                output_width=output_width,
+                output_height=output_height,
+                output_max_side=output_max_side,
+                resize_mode=resize_mode,
+            )
+            output = self._write_output(
+                resized,
+                output_format=output_format,
+                input_details=input_details,
+            )
+        output_path, fmt, width, height = output
         metadata = self._build_metadata(
             parent_paths=parent_paths,
             input_details=input_details,
@@ -163,28 +342,32 @@ class GeminiImageGenerator:
             "strength": strength,
         }
 
-    def _prepare_inputs(self, parent_paths: List[str]) -> Tuple[List[Image.Image], List[dict]]:
-        images: List[Image.Image] = []
-        input_details: List[dict] = []
-        for path in parent_paths:
-            img = _open_prepared_image(path)
-            images.append(img)
-            input_details.append(
-                {
-                    "path": path,
-                    "name": os.path.basename(path),
-                    "file_size": _safe_size(path),
-                    "dimensions": f"{img.width}x{img.height}",
-                }
-            )
+    def _prepare_inputs(self, parent_paths: List[str]) -> Tuple[List[Image.Image], InputDetails]:
+        # Pillow releases the GIL while decoding/resampling, so parents load in parallel.
+        images: List[Image.Image] = list(_prepare_executor.map(_open_prepared_image, parent_paths))
+        input_details = InputDetails()
+        for path, img in zip(parent_paths, images):
+            input_details.paths.append(path)
+            input_details.names.append(os.path.basename(path))
+            input_details.sizes.append(_safe_size(path))
+            input_details.dims.append(f"{img.width}x{img.height}")
         return images, input_details
 
     def _call_gemini(
         self,
         prompt: str,
         images: List[Image.Image],
-        input_details: List[dict],
+        input_details: InputDetails,
     ) -> Image.Image:
+        image_bytes = self._request_image_bytes(prompt, images, input_details)
+        return self._decode_image(image_bytes, input_details)
+
+    def _request_image_bytes(
+        self,
+        prompt: str,
+        images: List[Image.Image],
+        input_details: InputDetails,
+    ) -> bytes:
         try:
             response = self.client.models.generate_content(
                 model=settings.model_name,
@@ -210,15 +393,7 @@ class GeminiImageGenerator:
                 raise RuntimeError(
                     f"Gemini candidate 無 content/parts，finish_reason={finish_reason}"
                 )
-            for part in parts:
-                inline = getattr(part, "inline_data", None)
-                camel_inline = getattr(part, "inlineData", None)
-                if inline is not None and getattr(inline, "data", None) is not None:
-                    image_bytes = inline.data
-                    break
-                if camel_inline is not None and getattr(camel_inline, "data", None) is not None:
-                    image_bytes = camel_inline.data
-                    break
+            image_bytes = next((d for d in map(_extract_inline_data, parts) if d), None)
             if not image_bytes:
                 texts = [getattr(p, "text", "") for p in parts if getattr(p, "text", None)]
                 extra = f"；附帶文字：{' '.join(t for t in texts if t)}" if texts else ""
@@ -230,18 +405,25 @@ class GeminiImageGenerator:
                 f"解析 Gemini 回傳失敗：{e}{_format_input_diagnostics(input_details)}"
             ) from e
 
-        if isinstance(image_bytes, str):
+        if type(image_bytes) is not bytes:
             try:
-                image_bytes = base64.b64decode(image_bytes)
-            except Exception:
-                image_bytes = image_bytes.encode("utf-8")
-        elif isinstance(image_bytes, memoryview):
-            image_bytes = image_bytes.tobytes()
-        elif isinstance(image_bytes, bytearray):
-            image_bytes = bytes(image_bytes)
+                image_bytes = _coerce_image_bytes(image_bytes)
+            except (binascii.Error, TypeError) as e:
+                raise RuntimeError(
+                    f"Gemini 影像資料無法解碼：{e}{_format_input_diagnostics(input_details)}"
+                ) from e
+        return image_bytes
 
+    def _decode_image(self, image_bytes: bytes, input_details: InputDetails) -> Image.Image:
         try:
-            return Image.open(BytesIO(image_bytes))
+            # Decode eagerly so corrupt payloads fail here with diagnostics
+            # rather than later inside _resize_image, and the buffer is freed.
+            # BytesIO(bytes) shares the payload copy-on-write, so a per-call
+            # wrapper is cheaper than a pooled buffer that must memcpy it in.
+            with BytesIO(image_bytes) as buf:
+                img = Image.open(buf)
+                img.load()
+            return img
         except Exception as e:
             raise RuntimeError(
                 f"無法解析生成影像：{e}{_format_input_diagnostics(input_details)}"
@@ -267,25 +449,17 @@ class GeminiImageGenerator:
             h = int(target_h)
             mode = (resize_mode or "cover").lower()
             if mode == "fit":
-                fitted = ImageOps.contain(img, (w, h), Image.Resampling.LANCZOS)
-                if fitted.size != (w, h):
-                    pad_color = (
-                        (0, 0, 0, 0)
-                        if fmt in ("png",)
-                        and fitted.mode in ("RGBA", "LA")
-                        else (0, 0, 0)
-                    )
-                    canvas_mode = (
-                        "RGBA"
-                        if isinstance(pad_color, tuple) and len(pad_color) == 4
-                        else "RGB"
-                    )
+                fw, fh = _contain_size(img.size, (w, h))
+                # Resize straight to the contained size (skipped when already there)
+                # and paste once; no ImageOps.contain intermediate.
+                fitted = img if img.size == (fw, fh) else _lanczos_resize(img, (fw, fh))
+                if (fw, fh) != (w, h):
+                    canvas_mode = "RGBA" if fmt == "png" and fitted.mode in ("RGBA", "LA") else "RGB"
+                    pad_color = (0, 0, 0, 0) if canvas_mode == "RGBA" else (0, 0, 0)
                     if fitted.mode != canvas_mode:
                         fitted = fitted.convert(canvas_mode)
                     canvas = Image.new(canvas_mode, (w, h), pad_color)
-                    ox = (w - fitted.width) // 2
-                    oy = (h - fitted.height) // 2
-                    canvas.paste(fitted, (ox, oy))
+                    canvas.paste(fitted, ((w - fw) // 2, (h - fh) // 2))
                     img = canvas
                 else:
                     img = fitted
@@ -299,11 +473,11 @@ class GeminiImageGenerator:
         elif target_w and not target_h:
             w = int(target_w)
             h = max(1, round(w * img.height / img.width))
-            img = img.resize((w, h), Image.Resampling.LANCZOS)
+            img = _lanczos_resize(img, (w, h))
         elif target_h and not target_w:
             h = int(target_h)
             w = max(1, round(h * img.width / img.height))
-            img = img.resize((w, h), Image.Resampling.LANCZOS)
+            img = _lanczos_resize(img, (w, h))
         elif max_side:
             ms = int(max(1, max_side))
             orig_w, orig_h = img.size
@@ -311,7 +485,7 @@ class GeminiImageGenerator:
             if scale < 1.0:
                 new_w = max(1, round(orig_w * scale))
                 new_h = max(1, round(orig_h * scale))
-                img = img.resize((new_w, new_h), Image.Resampling.LANCZOS)
+                img = _lanczos_resize(img, (new_w, new_h))
         return img
 
     def _write_output(
@@ -319,11 +493,9 @@ class GeminiImageGenerator:
         img: Image.Image,
         *,
         output_format: Optional[str],
-        input_details: List[dict],
+        input_details: InputDetails,
     ) -> Tuple[str, str, int, int]:
-        fmt = (output_format or "png").lower()
-        if fmt == "jpg":
-            fmt = "jpeg"
+        fmt = _normalize_format(output_format)
 
         timestamp = self._timestamp_factory()
         filename = self._filename_builder(fmt, timestamp)
@@ -336,7 +508,15 @@ class GeminiImageGenerator:
                 params |= {"quality": 95}
                 if save_img.mode in ("RGBA", "LA"):
                     save_img = save_img.convert("RGB")
-            save_img.save(output_path, format=fmt.upper(), **params)
+            elif fmt == "png" and save_img.width * save_img.height > _LARGE_PNG_PIXELS:
+                params |= {"compress_level": _LARGE_PNG_COMPRESS_LEVEL}
+            with open(output_path, "wb") as f:
+                save_img.save(f, format=fmt.upper(), **params)
+                if settings.fsync_outputs:
+                    f.flush()
+                    os.fsync(f.fileno())
+            if settings.fsync_outputs:
+                fsync_dir(settings.offspring_dir)
         except Exception as e:
             raise RuntimeError(
                 f"輸出影像存檔失敗：{e}{_format_input_diagnostics(input_details)}"
@@ -345,11 +525,115 @@ class GeminiImageGenerator:
         width, height = img.size
         return output_path, fmt, width, height
 
+    def _write_output_vips(
+        self,
+        image_bytes: bytes,
+        *,
+        output_format: Optional[str],
+        output_width: Optional[int],
+        output_height: Optional[int],
+        output_max_side: Optional[int],
+        resize_mode: Optional[str],
+    ) -> Optional[Tuple[str, str, int, int]]:
+        """Decode, resize and encode in one libvips pipeline when pyvips is installed.
+
+        Returns None when pyvips is unavailable, the format is not handled, or
+        libvips fails for any reason, so the caller falls back to the Pillow path.
+        """
+        fmt = _normalize_format(output_format)
+        if pyvips is None or fmt not in ("png", "jpeg"):
+            return None
+
+        output_path: Optional[str] = None
+        try:
+            if output_width and output_height:
+                w, h = int(output_width), int(output_height)
+                if (resize_mode or "cover").lower() == "fit":
+                    img = pyvips.Image.thumbnail_buffer(image_bytes, w, height=h)
+                    keep_alpha = fmt == "png" and img.hasalpha()
+                    if img.hasalpha() and not keep_alpha:
+                        img = img.extract_band(0, n=img.bands - 1)
+                    if (img.width, img.height) != (w, h):
+                        img = img.embed(
+                            (w - img.width) // 2,
+                            (h - img.height) // 2,
+                            w,
+                            h,
+                            extend="background",
+                            background=[0] * img.bands,
+                        )
+                else:
+                    img = pyvips.Image.thumbnail_buffer(image_bytes, w, height=h, crop="centre")
+            elif output_width:
+                img = pyvips.Image.thumbnail_buffer(
+                    image_bytes, int(output_width), height=_VIPS_UNBOUNDED
+                )
+            elif output_height:
+                img = pyvips.Image.thumbnail_buffer(
+                    image_bytes, _VIPS_UNBOUNDED, height=int(output_height)
+                )
+            else:
+                ms = int(max(1, output_max_side))
+                img = pyvips.Image.thumbnail_buffer(image_bytes, ms, height=ms, size="down")
+
+            timestamp = self._timestamp_factory()
+            filename = self._filename_builder(fmt, timestamp)
+            output_path = os.path.join(settings.offspring_dir, filename)
+            if fmt == "jpeg":
+                img.jpegsave(output_path, Q=95)
+            else:
+                level = (
+                    _LARGE_PNG_COMPRESS_LEVEL
+                    if img.width * img.height > _LARGE_PNG_PIXELS
+                    else 6
+                )
+                img.pngsave(output_path, compression=level)
+            if settings.fsync_outputs:
+                fsync_file(output_path)
+                fsync_dir(settings.offspring_dir)
+        except Exception as exc:  # noqa: BLE001 - 綁定層可能丟出 pyvips.Error 以外的例外
+            logger.warning("libvips 輸出失敗，改用 Pillow：%s", exc)
+            if output_path is not None:
+                try:
+                    os.remove(output_path)
+                except OSError:
+                    pass
+            return None
+
+        return output_path, fmt, img.width, img.height
+
+    def _write_output_bytes(
+        self,
+        image_bytes: bytes,
+        *,
+        output_format: Optional[str],
+        input_details: InputDetails,
+    ) -> Tuple[str, str, int, int]:
+        fmt = _normalize_format(output_format)
+
+        timestamp = self._timestamp_factory()
+        filename = self._filename_builder(fmt, timestamp)
+        output_path = os.path.join(settings.offspring_dir, filename)
+
+        try:
+            # Only the header is parsed here; pixel data is never decoded.
+            with BytesIO(image_bytes) as buf, Image.open(buf) as probe:
+                width, height = probe.size
+            write_file_bytes(output_path, image_bytes, fsync=settings.fsync_outputs)
+            if settings.fsync_outputs:
+                fsync_dir(settings.offspring_dir)
+        except Exception as e:
+            raise RuntimeError(
+                f"輸出影像存檔失敗：{e}{_format_input_diagnostics(input_details)}"
+            ) from e
+
+        return output_path, fmt, width, height
+
     def _build_metadata(
         self,
         *,
         parent_paths: List[str],
-        input_details: List[dict],
+        input_details: InputDetails,
         prompt: str,
         strength: Optional[float],
         fmt: str,
@@ -358,13 +642,13 @@ class GeminiImageGenerator:
         output_path: str,
     ) -> dict:
         return {
-            "parents": [detail["name"] for detail in input_details],
+            "parents": list(input_details.names),
             "parents_full_paths": parent_paths,
-            "input_details": input_details,
+            "input_details": input_details.to_records(),
             "model_name": settings.model_name,
             "prompt": prompt,
             "strength": strength,
-            "created_at": datetime.utcnow().isoformat() + "Z",
+            "created_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
             "output_image": os.path.basename(output_path),
             "output_format": fmt,
             "output_size": {"width": width, "height": height},
@@ -396,12 +680,29 @@ def _generate_and_store_image(
     )
 
 
+def _generate_from_pool_sample(count: int, **kwargs) -> dict:
+    """Sample parents from the genes pool and generate, resampling if a parent vanishes.
+
+    A parent deleted after the pool was listed surfaces as FileNotFoundError
+    when it is opened (before the Gemini call); drop that directory's cached
+    listing and sample again instead of failing the request.
+    """
+    for attempt in range(_POOL_SAMPLE_ATTEMPTS):
+        parents = _pick_images_from_genes_pool(count)
+        try:
+            return _generate_and_store_image(parent_paths=parents, **kwargs)
+        except FileNotFoundError as exc:
+            if exc.filename not in parents or attempt == _POOL_SAMPLE_ATTEMPTS - 1:
+                raise
+            _forget_pool_listing(os.path.dirname(exc.filename))
+    raise AssertionError("unreachable")
+
+
 def generate_mixed_offspring(count: int = 2) -> dict:
-    parents = _pick_images_from_genes_pool(count)
     prompt = settings.fixed_prompt
 
-    result = _generate_and_store_image(
-        parent_paths=parents,
+    result = _generate_from_pool_sample(
+        count,
         prompt=prompt,
         strength=None,
         output_format="png",
@@ -427,49 +728,44 @@ def _resolve_parent_paths(explicit: List[str]) -> List[str]:
     paths in the same order as input. Raises ValueError if any cannot be resolved
     or is not an image file.
     """
-    pool_dirs: List[str] = getattr(settings, "genes_pool_dirs", [settings.genes_pool_dir])
+    pool_dirs = _genes_pool_dirs()
     # Also search in offspring_dir for images selected from the frontend
     search_dirs = pool_dirs + [settings.offspring_dir]
     resolved: List[str] = []
     for item in explicit:
-        candidate_paths: List[str] = []
-        # Absolute path
-        if os.path.isabs(item) and os.path.isfile(item):
-            candidate_paths.append(item)
-        # Try interpret as relative under each search dir
-        for d in search_dirs:
-            p = os.path.join(d, item)
-            if os.path.isfile(p):
-                candidate_paths.append(p)
-        # If still not found, try search by basename
-        base = os.path.basename(item)
-        if not candidate_paths:
-            for d in search_dirs:
-                try:
-                    if not os.path.isdir(d):
-                        continue
-                    for f in os.listdir(d):
-                        if f == base:
-                            p = os.path.join(d, f)
-                            if os.path.isfile(p):
-                                candidate_paths.append(p)
-                                break
-                except (FileNotFoundError, PermissionError) as e:
-                    continue
-        if not candidate_paths:
+        # Reject unsupported formats before touching the filesystem.
+        if not item.lower().endswith(_IMAGE_EXTS):
+            raise ValueError(f"父圖格式不支援（需 png/jpg）：{item}")
+        chosen = _find_parent_path(item, search_dirs)
+        if chosen is None:
             # Provide more helpful error message
             searched_dirs_str = ", ".join([str(d) for d in search_dirs])
             raise ValueError(
                 f"指定的父圖無法解析：{item}。已搜尋目錄：{searched_dirs_str}"
             )
-        # Prefer the first found (respecting dirs order)
-        chosen = candidate_paths[0]
-        if not chosen.lower().endswith((".png", ".jpg", ".jpeg")):
-            raise ValueError(f"父圖格式不支援（需 png/jpg）：{item}")
         resolved.append(chosen)
     return resolved
 
 
+def _find_parent_path(item: str, search_dirs: List[str]) -> Optional[str]:
+    # First hit wins (respecting dirs order), so stop probing as soon as one exists.
+    if os.path.isabs(item) and os.path.isfile(item):
+        return item
+    for d in search_dirs:
+        p = os.path.join(d, item)
+        if os.path.isfile(p):
+            return p
+    # Paths with directory parts fall back to their basename; plain basenames
+    # were already probed above.
+    base = os.path.basename(item)
+    if base != item:
+        for d in search_dirs:
+            p = os.path.join(d, base)
+            if os.path.isfile(p):
+                return p
+    return None
+
+
 def generate_mixed_offspring_v2(
     *,
     parents: Optional[List[str]] = None,
@@ -489,12 +785,8 @@ def generate_mixed_offspring_v2(
     if parents and len(parents) < 2:
         raise ValueError("父圖至少需要 2 張")
 
-    # Resolve parents or sample
-    if parents:
-        resolved_parents = _resolve_parent_paths(parents)
-    else:
-        sample_count = count if (count and count >= 2) else 2
-        resolved_parents = _pick_images_from_genes_pool(sample_count)
+    # Resolve explicit parents up front; sampled parents are picked at generation time
+    resolved_parents = _resolve_parent_paths(parents) if parents else None
 
     # Build prompt
     final_prompt = prompt.strip() if (prompt and prompt.strip()) else settings.fixed_prompt
@@ -506,8 +798,7 @@ def generate_mixed_offspring_v2(
             + f"\n[Guidance] Use the provided images as references with an image-to-image transformation strength ≈ {s:.2f} (0=loose, 1=strict)."
         )
 
-    result = _generate_and_store_image(
-        parent_paths=resolved_parents,
+    options = dict(
         prompt=final_prompt,
         strength=strength,
         output_format=output_format,
@@ -516,6 +807,11 @@ def generate_mixed_offspring_v2(
         output_max_side=output_max_side,
         resize_mode=resize_mode,
     )
+    if resolved_parents is not None:
+        result = _generate_and_store_image(parent_paths=resolved_parents, **options)
+    else:
+        sample_count = count if (count and count >= 2) else 2
+        result = _generate_from_pool_sample(sample_count, **options)
 
     return {
         "output_image_path": result["output_image_path"],
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
-import json
+import os
 import re
+import string
+import tempfile
+import threading
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
-from urllib.parse import quote_plus
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+from urllib.parse import quote_plus, urlencode
 
 from ..config import settings
 from ..models.iframe import IframeConfig, PanelConfig, ResolvedIframeConfig, ResolvedPanel, isoformat
@@ -18,18 +22,38 @@ _GLOBAL_CONFIG_PATH = _BASE_DIR / "iframe_config.json"
 _SNAPSHOT_BASE_DIR = _BASE_DIR / "snapshots" / "iframe_config"
 _SNAPSHOT_BASE_DIR.mkdir(parents=True, exist_ok=True)
 _GLOBAL_SNAPSHOT_KEY = "global"
+_BASE_URL = "/"
+# Characters quote_plus never escapes.
+_URL_SAFE_CHARS = frozenset(string.ascii_letters + string.digits + "_.-~")
 
 
 _CLIENT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+_match_identifier = _CLIENT_ID_PATTERN.fullmatch
+
+# Parsed configs keyed by file path, valid while (st_mtime_ns, st_size) match.
+_config_cache: Dict[Path, Tuple[int, int, IframeConfig]] = {}
+_config_cache_lock = threading.Lock()
+# Directories already created by _ensure_dir.
+_ensured_dirs: Set[Path] = {_BASE_DIR, _SNAPSHOT_BASE_DIR}
+_ensured_dirs_lock = threading.Lock()
+# (offspring_dir, st_mtime_ns, file names) used to validate panel images.
+_offspring_cache: Optional[Tuple[str, int, FrozenSet[str]]] = None
+
+
+@lru_cache(maxsize=512)
+def _check_identifier(value: str) -> Tuple[str, bool]:
+    """Return (stripped value, matches pattern); cached since callers raise on failure."""
+    candidate = value.strip()
+    return candidate, bool(candidate) and _match_identifier(candidate) is not None
 
 
 def _sanitize_client_id(value: Optional[str]) -> Optional[str]:
     if value is None:
         return None
-    candidate = value.strip()
+    candidate, valid = _check_identifier(value)
     if not candidate:
         return None
-    if not _CLIENT_ID_PATTERN.fullmatch(candidate):
+    if not valid:
         raise ValueError("target_client_id 僅允許字母、數字、底線、連字號")
     return candidate
 
@@ -37,39 +61,37 @@ def _sanitize_client_id(value: Optional[str]) -> Optional[str]:
 def _sanitize_snapshot_name(value: str) -> str:
     if not isinstance(value, str):
         raise ValueError("snapshot_name 必須為字串")
-    candidate = value.strip()
+    candidate, valid = _check_identifier(value)
     if not candidate:
         raise ValueError("snapshot_name 不可為空白")
-    if not _CLIENT_ID_PATTERN.fullmatch(candidate):
+    if not valid:
         raise ValueError("snapshot_name 僅允許字母、數字、底線、連字號")
     return candidate
 
 
-def _config_path_for(client_id: Optional[str]) -> Path:
-    if client_id:
-        safe = _sanitize_client_id(client_id)
-        return _BASE_DIR / f"iframe_config__{safe}.json"
+def _config_path_unchecked(safe_client_id: Optional[str]) -> Path:
+    if safe_client_id:
+        return _BASE_DIR / f"iframe_config__{safe_client_id}.json"
     return _GLOBAL_CONFIG_PATH
 
 
-def _snapshot_dir_for(client_id: Optional[str]) -> Path:
-    safe = _sanitize_client_id(client_id)
-    key = safe or _GLOBAL_SNAPSHOT_KEY
-    return _SNAPSHOT_BASE_DIR / key
+def _snapshot_dir_unchecked(safe_client_id: Optional[str]) -> Path:
+    return _SNAPSHOT_BASE_DIR / (safe_client_id or _GLOBAL_SNAPSHOT_KEY)
+
 
+def _snapshot_path_unchecked(safe_client_id: Optional[str], safe_snapshot_name: str) -> Path:
+    return _snapshot_dir_unchecked(safe_client_id) / f"{safe_snapshot_name}.json"
 
-def _snapshot_path_for(client_id: Optional[str], snapshot_name: str) -> Path:
-    safe_snapshot = _sanitize_snapshot_name(snapshot_name)
-    directory = _snapshot_dir_for(client_id)
-    return directory / f"{safe_snapshot}.json"
+
+def _config_path_for(client_id: Optional[str]) -> Path:
+    return _config_path_unchecked(_sanitize_client_id(client_id))
 
 
 def _current_snapshot_timestamp() -> str:
     return datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
 
 
-def _generate_snapshot_name(client_id: Optional[str], snapshot_name: Optional[str]) -> str:
-    sanitized_client_id = _sanitize_client_id(client_id)
+def _generate_snapshot_name(sanitized_client_id: Optional[str], snapshot_name: Optional[str]) -> str:
     safe_descriptor: Optional[str] = None
     if snapshot_name is not None:
         if not isinstance(snapshot_name, str):
@@ -86,7 +108,8 @@ def _generate_snapshot_name(client_id: Optional[str], snapshot_name: Optional[st
 
     candidate = base_name
     counter = 0
-    while _snapshot_path_for(sanitized_client_id, candidate).exists():
+    directory = _snapshot_dir_unchecked(sanitized_client_id)
+    while (directory / f"{candidate}.json").exists():
         counter += 1
         candidate = f"{base_name}_{counter}"
     return candidate
@@ -102,26 +125,76 @@ def _default_config() -> IframeConfig:
     return IframeConfig(layout="grid", gap=12, columns=2, panels=panels)
 
 
-def _load_raw(client_id: Optional[str] = None) -> Dict[str, object] | None:
-    path = _config_path_for(client_id)
-    if not path.exists():
-        return None
+def _read_config(path: Path) -> IframeConfig:
+    return IframeConfig.model_validate_json(path.read_bytes())
+
+
+def _ensure_dir(directory: Path) -> None:
+    """mkdir a config/snapshot directory once per process instead of on every write."""
+    if directory in _ensured_dirs:
+        return
+    directory.mkdir(parents=True, exist_ok=True)
+    with _ensured_dirs_lock:
+        _ensured_dirs.add(directory)
+
+
+def _write_config(path: Path, config: IframeConfig) -> None:
+    payload = config.model_dump_json(indent=2).encode("utf-8")
+    # Write to a unique sibling temp file, then rename atomically, so readers
+    # never observe a half-written config and concurrent writers never share
+    # a temp file.
+    _ensure_dir(path.parent)
     try:
-        with path.open("r", encoding="utf-8") as fp:
-            return json.load(fp)
-    except Exception:
-        return None
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp")
+    except FileNotFoundError:
+        # Directory was removed after we cached it; recreate and retry once.
+        with _ensured_dirs_lock:
+            _ensured_dirs.discard(path.parent)
+        _ensure_dir(path.parent)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            # mkstemp creates 0600; keep the mode plain writes used to get.
+            if hasattr(os, "fchmod"):
+                os.fchmod(f.fileno(), 0o644)
+            f.write(payload)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.remove(tmp_name)
+        except OSError:
+            pass
+        raise
 
 
-def load_iframe_config(client_id: Optional[str] = None) -> IframeConfig:
-    sanitized_client_id = _sanitize_client_id(client_id)
-    raw = _load_raw(sanitized_client_id)
-    if raw is None:
+def _load_config_unchecked(safe_client_id: Optional[str]) -> IframeConfig:
+    path = _config_path_unchecked(safe_client_id)
+    try:
+        stats = path.stat()
+    except OSError:
         return _default_config()
+    cached = _config_cache.get(path)
+    if cached is not None and cached[0] == stats.st_mtime_ns and cached[1] == stats.st_size:
+        return cached[2]
+
     try:
-        return IframeConfig(**raw)
+        config = _read_config(path)
     except Exception:
         return _default_config()
+    with _config_cache_lock:
+        _config_cache[path] = (stats.st_mtime_ns, stats.st_size, config)
+    return config
+
+
+def load_iframe_config(client_id: Optional[str] = None) -> IframeConfig:
+    return _load_config_unchecked(_sanitize_client_id(client_id))
+
+
+def _remember_config(path: Path, config: IframeConfig) -> None:
+    # Seed the cache with the config just written so the next load skips parsing.
+    stats = path.stat()
+    with _config_cache_lock:
+        _config_cache[path] = (stats.st_mtime_ns, stats.st_size, config)
 
 
 def save_iframe_config(payload: Dict[str, object]) -> tuple[IframeConfig, Optional[str]]:
@@ -134,25 +207,20 @@ def save_iframe_config(payload: Dict[str, object]) -> tuple[IframeConfig, Option
     config_payload = {k: v for k, v in payload.items() if k != "target_client_id"}
     config = IframeConfig(**config_payload)
     _validate_images(config)
-    data = config.model_dump()
 
-    path = _config_path_for(target_client_id)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as fp:
-        json.dump(data, fp, ensure_ascii=False, indent=2)
+    path = _config_path_unchecked(target_client_id)
+    _write_config(path, config)
+    _remember_config(path, config)
     return config, target_client_id
 
 
 def save_iframe_config_snapshot(client_id: Optional[str], snapshot_name: Optional[str] = None) -> Dict[str, object]:
     sanitized_client_id = _sanitize_client_id(client_id)
     safe_snapshot_name = _generate_snapshot_name(sanitized_client_id, snapshot_name)
-    config = load_iframe_config(sanitized_client_id)
-    data = config.model_dump()
+    config = _load_config_unchecked(sanitized_client_id)
 
-    path = _snapshot_path_for(sanitized_client_id, safe_snapshot_name)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as fp:
-        json.dump(data, fp, ensure_ascii=False, indent=2)
+    path = _snapshot_path_unchecked(sanitized_client_id, safe_snapshot_name)
+    _write_config(path, config)
 
     stats = path.stat()
     return {
@@ -165,27 +233,33 @@ def save_iframe_config_snapshot(client_id: Optional[str], snapshot_name: Optiona
 
 def list_iframe_config_snapshots(client_id: Optional[str]) -> Tuple[Optional[str], List[Dict[str, object]]]:
     sanitized_client_id = _sanitize_client_id(client_id)
-    directory = _snapshot_dir_for(sanitized_client_id)
-    if not directory.exists():
+    directory = _snapshot_dir_unchecked(sanitized_client_id)
+    items: List[Tuple[str, float, int]] = []
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                name = entry.name
+                if not name.endswith(".json"):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    stats = entry.stat()
+                except OSError:
+                    continue
+                items.append((name[:-5], stats.st_mtime, stats.st_size))
+    except FileNotFoundError:
         return sanitized_client_id, []
 
-    records: List[Dict[str, object]] = []
-    items: List[Tuple[Path, float, int]] = []
-    for candidate in directory.glob("*.json"):
-        try:
-            stats = candidate.stat()
-        except OSError:
-            continue
-        items.append((candidate, stats.st_mtime, stats.st_size))
-
-    for path, mtime, size in sorted(items, key=lambda item: item[1], reverse=True):
-        records.append(
-            {
-                "name": path.stem,
-                "created_at": isoformat(mtime),
-                "size_bytes": size,
-            },
-        )
+    items.sort(key=lambda item: item[1], reverse=True)
+    records: List[Dict[str, object]] = [
+        {
+            "name": name,
+            "created_at": isoformat(mtime),
+            "size_bytes": size,
+        }
+        for name, mtime, size in items
+    ]
 
     return sanitized_client_id, records
 
@@ -193,79 +267,140 @@ def list_iframe_config_snapshots(client_id: Optional[str]) -> Tuple[Optional[str
 def restore_iframe_config_snapshot(client_id: Optional[str], snapshot_name: str) -> tuple[IframeConfig, Optional[str]]:
     sanitized_client_id = _sanitize_client_id(client_id)
     safe_snapshot_name = _sanitize_snapshot_name(snapshot_name)
-    path = _snapshot_path_for(sanitized_client_id, safe_snapshot_name)
+    path = _snapshot_path_unchecked(sanitized_client_id, safe_snapshot_name)
     if not path.exists():
         raise FileNotFoundError("snapshot 不存在")
 
-    with path.open("r", encoding="utf-8") as fp:
-        raw = json.load(fp)
-
-    config = IframeConfig(**raw)
+    config = _read_config(path)
     _validate_images(config)
 
-    target_path = _config_path_for(sanitized_client_id)
-    target_path.parent.mkdir(parents=True, exist_ok=True)
-    with target_path.open("w", encoding="utf-8") as fp:
-        json.dump(config.model_dump(), fp, ensure_ascii=False, indent=2)
+    target_path = _config_path_unchecked(sanitized_client_id)
+    _write_config(target_path, config)
+    _remember_config(target_path, config)
 
     return config, sanitized_client_id
 
 
-def resolve_iframe_config(config: IframeConfig, client_id: Optional[str] = None) -> ResolvedIframeConfig:
-    base_url = "/"
+def _fast_quote(value: str, safe: str = "", encoding: Optional[str] = None, errors: Optional[str] = None) -> str:
+    # Generated filenames and param keys are almost always already URL-safe.
+    # Signature matches urlencode's quote_via hook.
+    if _URL_SAFE_CHARS.issuperset(value):
+        return value
+    return quote_plus(value, safe, encoding, errors)
+
+
+@lru_cache(maxsize=1024)
+def _build_src(
+    image: Optional[str],
+    url: Optional[str],
+    params_items: Tuple[Tuple[str, str], ...],
+) -> Optional[str]:
+    if url:
+        return url
+    if not image:
+        return None
+    query = urlencode((("img", image), *params_items), quote_via=_fast_quote)
+    return f"{_BASE_URL}?{query}"
+
+
+def _panel_src(panel: PanelConfig) -> Optional[str]:
+    # Memoized on (image, url, params). Params keep insertion order because that
+    # order is visible in the query string; the key covers every input, so saves
+    # never need to clear the cache.
+    p_url = panel.url
+    if p_url:
+        return p_url
+    params_items = tuple(
+        (str(key), str(value)) for key, value in panel.params.items() if value is not None
+    )
+    return _build_src(panel.image, None, params_items)
+
+
+def _cached_mtime(path: Path, config: IframeConfig) -> Optional[float]:
+    # Mtime recorded when this exact config object was loaded or written.
+    cached = _config_cache.get(path)
+    if cached is not None and cached[2] is config:
+        return cached[0] / 1_000_000_000
+    return None
+
+
+def resolve_iframe_config(
+    config: IframeConfig,
+    client_id: Optional[str] = None,
+    updated_at: Optional[float] = None,
+) -> ResolvedIframeConfig:
     panels: List[ResolvedPanel] = []
+    append = panels.append
     for idx, panel in enumerate(config.panels):
-        final_src: Optional[str] = None
-        if panel.url:
-            final_src = panel.url
-        elif panel.image:
-            query_parts: List[str] = ["img=" + quote_plus(panel.image)]
-            for key, value in panel.params.items():
-                if value is None:
-                    continue
-                key_encoded = quote_plus(str(key))
-                value_encoded = quote_plus(str(value))
-                query_parts.append(f"{key_encoded}={value_encoded}")
-            query = "&".join(query_parts)
-            final_src = f"{base_url}?{query}" if query else base_url
+        final_src = _panel_src(panel)
         if not final_src:
             continue
-        panels.append(
+        append(
             ResolvedPanel(
                 id=panel.id or f"panel_{idx+1}",
                 src=final_src,
                 ratio=panel.ratio,
                 label=panel.label,
                 image=panel.image,
-                params=dict(panel.params),
+                params=panel.params,
                 url=panel.url,
                 col_span=panel.col_span,
                 row_span=panel.row_span,
             ),
         )
 
-    path = _config_path_for(client_id)
-    updated_at = isoformat(path.stat().st_mtime) if path.exists() else None
+    if updated_at is None:
+        # Only stat when the caller has no mtime from a recent load or write.
+        try:
+            updated_at = _config_path_for(client_id).stat().st_mtime
+        except OSError:
+            updated_at = None
     return ResolvedIframeConfig(
         layout=config.layout,
         gap=config.gap,
         columns=config.columns,
         panels=panels,
-        updated_at=updated_at,
+        updated_at=isoformat(updated_at),
     )
 
 
+def _offspring_filenames() -> FrozenSet[str]:
+    """Return file names in offspring_dir, rescanning only when the directory mtime changes."""
+    global _offspring_cache
+    directory = settings.offspring_dir
+    try:
+        mtime_ns = os.stat(directory).st_mtime_ns
+    except OSError:
+        return frozenset()
+    cached = _offspring_cache
+    if cached is not None and cached[0] == directory and cached[1] == mtime_ns:
+        return cached[2]
+    with os.scandir(directory) as it:
+        names = frozenset(entry.name for entry in it if entry.is_file())
+    _offspring_cache = (directory, mtime_ns, names)
+    return names
+
+
 def _validate_images(config: IframeConfig) -> None:
-    offspring_dir = Path(settings.offspring_dir)
-    for panel in config.panels:
-        if panel.image:
-            candidate = offspring_dir / panel.image
-            if not candidate.is_file():
-                raise ValueError(f"找不到指定的圖像檔案：{panel.image}")
+    requested = {panel.image for panel in config.panels if panel.image}
+    if not requested:
+        return
+    missing = requested.difference(_offspring_filenames())
+    if missing:
+        # The cached listing can lag a file created within the same mtime tick;
+        # confirm misses on disk before rejecting them.
+        directory = settings.offspring_dir
+        missing = {name for name in missing if not os.path.isfile(os.path.join(directory, name))}
+    if not missing:
+        return
+    # Report the first missing image in panel order for a stable message.
+    first_missing = next(panel.image for panel in config.panels if panel.image in missing)
+    raise ValueError(f"找不到指定的圖像檔案：{first_missing}")
 
 
 def config_payload_for_response(config: IframeConfig, client_id: Optional[str] = None) -> Dict[str, object]:
-    resolved = resolve_iframe_config(config, client_id)
+    updated_at = _cached_mtime(_config_path_for(client_id), config)
+    resolved = resolve_iframe_config(config, client_id, updated_at)
     payload = resolved.to_payload()
     payload["raw"] = config.model_dump()
     if client_id:
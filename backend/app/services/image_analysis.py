@@ -3,9 +3,10 @@
 from __future__ import annotations
 
 import os
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
+from google.genai import types
 from PIL import Image, ImageOps
 
 from ..config import settings
@@ -20,16 +21,48 @@ DEFAULT_ANALYSIS_PROMPT = (
 )
 
 
+# Files that can be uploaded as-is (no decode/re-encode) when already small enough.
+_INLINE_MIME_TYPES = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+_MAX_INLINE_BYTES = 4 * 1024 * 1024
+_EXIF_ORIENTATION = 0x0112
+
+
+def _target_size() -> int:
+    # Gemini accepts reasonably large inputs, but we clamp to avoid extremely large uploads.
+    return max(512, int(getattr(settings, "image_size", 1024)))
+
+
+def _inline_image_part(path: str) -> Optional[types.Part]:
+    """Return the file bytes as an inline part when no resize or re-orientation is needed."""
+    try:
+        if os.path.getsize(path) > _MAX_INLINE_BYTES:
+            return None
+        # Image.open only parses the header here; pixels are never decoded.
+        with Image.open(path) as img:
+            mime_type = _INLINE_MIME_TYPES.get(img.format)
+            if mime_type is None or img.mode not in ("RGB", "RGBA"):
+                return None
+            if max(img.size) > _target_size():
+                return None
+            if img.getexif().get(_EXIF_ORIENTATION, 1) != 1:
+                return None
+        with open(path, "rb") as fp:
+            data = fp.read()
+    except (OSError, Image.UnidentifiedImageError):
+        return None
+    return types.Part.from_bytes(data=data, mime_type=mime_type)
+
+
 def _load_image(path: str) -> Image.Image:
-    if not os.path.isfile(path):
-        raise FileNotFoundError(f"screenshot not found: {path}")
+    target = _target_size()
     img = Image.open(path)
+    if img.format == "JPEG" and max(img.size) > target:
+        # Let libjpeg decode at 1/2..1/8 scale (never below target) instead of full resolution.
+        img.draft("RGB", (target, target))
     img = ImageOps.exif_transpose(img)
     if img.mode not in ("RGB", "RGBA"):
         img = img.convert("RGB")
-    # Gemini accepts reasonably large inputs, but we clamp to avoid extremely large uploads.
     max_side = max(img.size)
-    target = max(512, int(getattr(settings, "image_size", 1024)))
     if max_side > target:
         img.thumbnail((target, target), Image.Resampling.LANCZOS)
     return img
@@ -72,14 +105,17 @@ def analyze_screenshot(image_path: str, prompt: Optional[str] = None) -> Dict[st
         Dictionary containing generated summary text, raw segments, safety metadata, and timestamps.
     """
 
-    img = _load_image(image_path)
+    if not os.path.isfile(image_path):
+        raise FileNotFoundError(f"screenshot not found: {image_path}")
+    # Small screenshots go up as their original bytes; only oversized ones are decoded and resized.
+    image_content = _inline_image_part(image_path) or _load_image(image_path)
     client = get_gemini_client()
 
     user_prompt = prompt.strip() if prompt and prompt.strip() else DEFAULT_ANALYSIS_PROMPT
 
     response = client.models.generate_content(
         model=settings.model_name,
-        contents=[user_prompt, img],
+        contents=[user_prompt, image_content],
     )
 
     candidates = getattr(response, "candidates", None) or []
@@ -105,7 +141,7 @@ def analyze_screenshot(image_path: str, prompt: Optional[str] = None) -> Dict[st
         "model": settings.model_name,
         "prompt": user_prompt,
         "image": os.path.abspath(image_path),
-        "generated_at": datetime.utcnow().isoformat() + "Z",
+        "generated_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
         "finish_reason": getattr(primary, "finish_reason", None),
         "safety_ratings": _serialise_safety(primary),
     }
@@ -19,23 +19,76 @@ from __future__ import annotations
 
 import json
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, Set, List, Optional
+from typing import Any, Dict, Iterator, Set, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # Optional: stdlib json is used when orjson is not installed
+    orjson = None
 
 from ..config import settings
 
 
 INDEX_VERSION = 1
 INDEX_FILENAME = "kinship_index.json"
+_SCAN_WORKERS = 16
+
+
+def _loads(payload: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+def _dumps(data: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def _read_metadata_file(path: str) -> Any:
+    try:
+        with open(path, "rb") as f:
+            return _loads(f.read())
+    except Exception as e:  # reported by the caller, which skips the file
+        return e
+
+
+def _read_offspring_metadata(metadata_dir: Path) -> Iterator[Tuple[str, Any]]:
+    """Yield (file name, parsed JSON or the exception raised) for offspring_*.json files."""
+    try:
+        with os.scandir(metadata_dir) as it:
+            entries = [
+                (entry.name, entry.path)
+                for entry in it
+                if entry.name.startswith("offspring_") and entry.name.endswith(".json") and entry.is_file()
+            ]
+    except FileNotFoundError:
+        return
+    if not entries:
+        return
+    with ThreadPoolExecutor(max_workers=_SCAN_WORKERS, thread_name_prefix="kinship-scan") as executor:
+        results = executor.map(_read_metadata_file, [path for _, path in entries])
+        for (name, _), data in zip(entries, results):
+            yield name, data
+
+
+def _freeze_map(raw: Dict[str, List[str]]) -> Dict[str, Tuple[str, ...]]:
+    """Convert a name -> names map to interned keys and immutable tuples."""
+    intern = sys.intern
+    return {intern(k): tuple(intern(x) for x in v) for k, v in raw.items()}
 
 
 class KinshipIndex:
     """Manages persistent kinship index with fast queries."""
     
     def __init__(self) -> None:
-        self._parents_map: Dict[str, List[str]] = {}
-        self._children_map: Dict[str, List[str]] = {}
+        self._parents_map: Dict[str, Tuple[str, ...]] = {}
+        self._children_map: Dict[str, Tuple[str, ...]] = {}
         self._loaded: bool = False
         self._index_path = Path(settings.metadata_dir) / INDEX_FILENAME
     
@@ -45,14 +98,13 @@ class KinshipIndex:
             return False
         
         try:
-            with self._index_path.open("r", encoding="utf-8") as f:
-                data = json.load(f)
+            data = _loads(self._index_path.read_bytes())
             
             if data.get("version") != INDEX_VERSION:
                 return False
             
-            self._parents_map = data.get("parents_map", {})
-            self._children_map = data.get("children_map", {})
+            self._parents_map = _freeze_map(data.get("parents_map", {}))
+            self._children_map = _freeze_map(data.get("children_map", {}))
             self._loaded = True
             
             print(f"✓ Kinship index loaded: {data.get('metadata_count', 0)} items from {data.get('built_at', 'unknown')}")
@@ -66,49 +118,49 @@ class KinshipIndex:
         print("🔨 Building kinship index from metadata...")
         
         metadata_dir = Path(settings.metadata_dir)
-        parents_map: Dict[str, Set[str]] = {}
-        children_map: Dict[str, Set[str]] = {}
+        parents_map: Dict[str, List[str]] = {}
+        children_map: Dict[str, List[str]] = {}
         
         count = 0
-        if metadata_dir.exists():
-            for json_file in metadata_dir.glob("offspring_*.json"):
-                try:
-                    with json_file.open("r", encoding="utf-8") as f:
-                        data = json.load(f)
-                    
-                    # 取得後代檔名
-                    child = data.get("output_image", "").strip()
-                    if not child:
-                        continue
-                    
-                    child = os.path.basename(child)
-                    
-                    # 取得父母列表
-                    raw_parents = data.get("parents", [])
-                    if not isinstance(raw_parents, list):
-                        continue
-                    
-                    parents = []
-                    for p in raw_parents:
-                        if isinstance(p, str) and p.strip():
-                            parents.append(os.path.basename(p.strip()))
-                    
-                    if not parents:
-                        continue
-                    
-                    # 建立反向索引
-                    parents_map.setdefault(child, set()).update(parents)
-                    for parent in parents:
-                        children_map.setdefault(parent, set()).add(child)
-                    
-                    count += 1
-                except Exception as e:
-                    print(f"⚠️  Skipped {json_file.name}: {e}")
+        for name, data in _read_offspring_metadata(metadata_dir):
+            if isinstance(data, Exception):
+                print(f"⚠️  Skipped {name}: {data}")
+                continue
+            try:
+                # 取得後代檔名
+                child = data.get("output_image", "").strip()
+                if not child:
+                    continue
+                
+                child = os.path.basename(child)
+                
+                # 取得父母列表
+                raw_parents = data.get("parents", [])
+                if not isinstance(raw_parents, list):
+                    continue
+                
+                parents = []
+                for p in raw_parents:
+                    if isinstance(p, str) and p.strip():
+                        parents.append(os.path.basename(p.strip()))
+                
+                if not parents:
                     continue
+                
+                # 建立反向索引
+                # 先累積為 list，最後再一次去重排序
+                parents_map.setdefault(child, []).extend(parents)
+                for parent in parents:
+                    children_map.setdefault(parent, []).append(child)
+                
+                count += 1
+            except Exception as e:
+                print(f"⚠️  Skipped {name}: {e}")
+                continue
         
-        # 轉成可序列化的格式（set → sorted list）
-        parents_serializable = {k: sorted(v) for k, v in parents_map.items()}
-        children_serializable = {k: sorted(v) for k, v in children_map.items()}
+        # 轉成可序列化的格式（list → 去重後 sorted list）
+        parents_serializable = {k: sorted(set(v)) for k, v in parents_map.items()}
+        children_serializable = {k: sorted(set(v)) for k, v in children_map.items()}
         
         # 構建索引文件
         index_data = {
@@ -120,12 +172,11 @@ class KinshipIndex:
         }
         
         # 存檔
-        with self._index_path.open("w", encoding="utf-8") as f:
-            json.dump(index_data, f, indent=2, ensure_ascii=False)
+        self._index_path.write_bytes(_dumps(index_data))
         
         # 載入到記憶體
-        self._parents_map = parents_serializable
-        self._children_map = children_serializable
+        self._parents_map = _freeze_map(parents_serializable)
+        self._children_map = _freeze_map(children_serializable)
         self._loaded = True
         
         print(f"✓ Kinship index built and saved: {count} offspring, {len(children_map)} parents")
@@ -150,23 +201,23 @@ class KinshipIndex:
     
     # ---- Query API ----
     
-    def parents_of(self, name: str) -> List[str]:
-        """Get parents of an image. Returns empty list if not found."""
+    def parents_of(self, name: str) -> Tuple[str, ...]:
+        """Get parents of an image. Returns empty tuple if not found."""
         self.ensure_loaded()
-        return list(self._parents_map.get(name, []))
+        return self._parents_map.get(name, ())
     
-    def children_of(self, name: str) -> List[str]:
-        """Get children of an image. Returns empty list if not found."""
+    def children_of(self, name: str) -> Tuple[str, ...]:
+        """Get children of an image. Returns empty tuple if not found."""
         self.ensure_loaded()
-        return list(self._children_map.get(name, []))
+        return self._children_map.get(name, ())
     
     def siblings_of(self, name: str) -> List[str]:
         """Get siblings (shares at least one parent). Excludes self."""
         self.ensure_loaded()
         siblings: Set[str] = set()
-        parents = self._parents_map.get(name, [])
+        parents = self._parents_map.get(name, ())
         for parent in parents:
-            siblings.update(self._children_map.get(parent, []))
+            siblings.update(self._children_map.get(parent, ()))
         siblings.discard(name)
         return sorted(siblings)
     
@@ -185,24 +236,28 @@ class KinshipIndex:
         if depth == 0:
             return []
         
+        parents_map = self._parents_map
+        frontier: List[str] = list(dict.fromkeys(parents_map.get(name, ())))
         visited: Set[str] = {name}
-        frontier: Set[str] = set(self._parents_map.get(name, []))
+        visited.update(frontier)
         levels: List[List[str]] = []
         level_no = 1
         
         while frontier:
-            level_items = sorted(frontier)
-            levels.append(level_items)
-            visited.update(frontier)
+            frontier.sort()
+            levels.append(frontier)
             
             if depth != -1 and level_no >= depth:
                 break
             
-            next_frontier: Set[str] = set()
+            # 發現時即標記 visited，同一層不會重複加入
+            next_frontier: List[str] = []
+            append = next_frontier.append
             for node in frontier:
-                for p in self._parents_map.get(node, []):
+                for p in parents_map.get(node, ()):
                     if p not in visited:
-                        next_frontier.add(p)
+                        visited.add(p)
+                        append(p)
             
             frontier = next_frontier
             level_no += 1
@@ -3,24 +3,56 @@
 from __future__ import annotations
 
 import asyncio
+import json
+from dataclasses import dataclass
 from typing import Any, Iterable, Optional
 
 from fastapi import WebSocket
 
+try:
+    import orjson
+except ImportError:  # Optional: stdlib json is used when orjson is not installed
+    orjson = None
+
+
+# Subtitle/caption updates within this window collapse into the latest one.
+_COALESCE_DELAY_SECONDS = 0.05
+
+
+def _encode_message(message: dict[str, Any]) -> str:
+    """Encode a payload once for fan-out, matching WebSocket.send_json's compact output."""
+
+    if orjson is not None:
+        return orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+@dataclass(slots=True)
+class ConnectionInfo:
+    """Per-connection state; slots keep attribute access cheap and instances small."""
+
+    client_id: Optional[str] = None
+
 
 class RealtimeBroadcaster:
     """Manage active WebSocket connections and broadcast JSON payloads."""
 
     def __init__(self) -> None:
         self._lock = asyncio.Lock()
-        self._connections: dict[WebSocket, dict[str | None]] = {}
+        self._connections: dict[WebSocket, ConnectionInfo] = {}
+        # Reverse index: client_id -> sockets, kept in sync with _connections.
+        self._by_client: dict[str | None, set[WebSocket]] = {}
+        # (message type, target) -> latest payload waiting for its scheduled flush.
+        self._pending_broadcasts: dict[tuple[str, str | None], dict[str, Any]] = {}
+        self._flush_tasks: set[asyncio.Task] = set()
 
     async def add_connection(self, websocket: WebSocket) -> None:
         """Register a new WebSocket connection."""
 
         await websocket.accept()
         async with self._lock:
-            self._connections[websocket] = {"client_id": None}
+            self._connections[websocket] = ConnectionInfo()
+            self._by_client.setdefault(None, set()).add(websocket)
 
     async def register_client(self, websocket: WebSocket, client_id: Optional[str]) -> None:
         """Associate a logical client id with the WebSocket connection."""
@@ -29,51 +61,66 @@ class RealtimeBroadcaster:
             info = self._connections.get(websocket)
             if info is None:
                 return
-            info["client_id"] = client_id
+            self._unindex(websocket, info.client_id)
+            info.client_id = client_id
+            self._by_client.setdefault(client_id, set()).add(websocket)
 
     async def remove_connection(self, websocket: WebSocket) -> None:
         """Remove a WebSocket connection from the registry."""
 
         async with self._lock:
-            self._connections.pop(websocket, None)
+            self._discard(websocket)
 
     async def list_clients(self) -> list[dict]:
         """Return snapshot of registered clients with connection counts."""
 
-        async with self._lock:
-            counts: dict[str | None, int] = {}
-            for info in self._connections.values():
-                client_id = info.get("client_id")
-                counts[client_id] = counts.get(client_id, 0) + 1
-
-        clients: list[dict] = []
-        for client_id, connection_count in counts.items():
-            clients.append(
-                {
-                    "client_id": client_id,
-                    "connections": connection_count,
-                }
-            )
+        # _by_client is maintained on register/remove, so this is O(distinct clients).
+        clients = [
+            {
+                "client_id": client_id,
+                "connections": len(sockets),
+            }
+            for client_id, sockets in self._by_client.items()
+        ]
         clients.sort(key=lambda item: (item["client_id"] is None, item["client_id"] or ""))
         return clients
 
     async def broadcast(self, message: dict[str, Any], target_client_id: Optional[str] = None) -> None:
-        """Broadcast a JSON payload to all or targeted clients."""
-
-        async with self._lock:
-            targets = [
-                ws
-                for ws, info in self._connections.items()
-                if target_client_id is None or info.get("client_id") == target_client_id
-            ]
-        for connection in targets:
-            await self._send(connection, message)
+        """Broadcast a JSON payload to all or targeted clients.
+
+        Sends run concurrently on the event loop; under uvicorn this is uvloop
+        (installed with uvicorn[standard] and picked by ``--loop auto``).
+        """
+
+        # Snapshot without the lock: no await happens between reading the
+        # registry and copying it, so mutations cannot interleave.
+        # Dead-letter broadcasts (nobody connected / target offline) return
+        # before copying anything or encoding the payload.
+        sockets = self._connections if target_client_id is None else self._by_client.get(target_client_id)
+        if not sockets:
+            return
+        targets = list(sockets)
+        # Encode once and send the same text to all targets concurrently.
+        text = _encode_message(message)
+        results = await asyncio.gather(
+            *(self._send_text(connection, text) for connection in targets),
+            return_exceptions=True,
+        )
+        failed = [ws for ws, result in zip(targets, results) if isinstance(result, Exception)]
+        if failed:
+            async with self._lock:
+                for ws in failed:
+                    self._discard(ws)
 
     async def send_messages(self, websocket: WebSocket, messages: Iterable[dict[str, Any]]) -> None:
         """Send a collection of messages to a specific WebSocket."""
 
-        for message in messages:
-            await self._send(websocket, message)
+        try:
+            for message in messages:
+                await self._send_text(websocket, _encode_message(message))
+        except Exception:
+            # A dead socket is dropped once; the remaining messages are not attempted.
+            await self.remove_connection(websocket)
 
     async def broadcast_sound_play(
         self,
@@ -134,7 +181,7 @@ class RealtimeBroadcaster:
         }
         if target_client_id:
             payload["target_client_id"] = target_client_id
-        await self.broadcast(payload, target_client_id=target_client_id)
+        self._broadcast_latest(payload, target_client_id)
 
     async def broadcast_caption(
         self,
@@ -147,12 +194,45 @@ class RealtimeBroadcaster:
         }
         if target_client_id:
             payload["target_client_id"] = target_client_id
-        await self.broadcast(payload, target_client_id=target_client_id)
-
-    async def _send(self, websocket: WebSocket, message: dict[str, Any]) -> None:
-        try:
-            await websocket.send_json(message)
-        except Exception:
-            await self.remove_connection(websocket)
+        self._broadcast_latest(payload, target_client_id)
+
+    def _broadcast_latest(self, payload: dict[str, Any], target_client_id: Optional[str]) -> None:
+        """Queue a state update; only the newest payload per (type, target) is sent.
+
+        The first update in a window schedules the flush and later ones just
+        replace the payload, so a steady stream still goes out every window.
+        """
+
+        key = (payload["type"], target_client_id)
+        scheduled = key in self._pending_broadcasts
+        self._pending_broadcasts[key] = payload
+        if not scheduled:
+            asyncio.get_running_loop().call_later(_COALESCE_DELAY_SECONDS, self._flush_broadcast, key)
+
+    def _flush_broadcast(self, key: tuple[str, str | None]) -> None:
+        payload = self._pending_broadcasts.pop(key, None)
+        if payload is None:
+            return
+        task = asyncio.get_running_loop().create_task(self.broadcast(payload, target_client_id=key[1]))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    def _unindex(self, websocket: WebSocket, client_id: str | None) -> None:
+        sockets = self._by_client.get(client_id)
+        if sockets is None:
+            return
+        sockets.discard(websocket)
+        if not sockets:
+            del self._by_client[client_id]
+
+    def _discard(self, websocket: WebSocket) -> None:
+        """Drop a socket from both indexes; caller must hold the lock."""
+
+        info = self._connections.pop(websocket, None)
+        if info is not None:
+            self._unindex(websocket, info.client_id)
+
+    async def _send_text(self, websocket: WebSocket, text: str) -> None:
+        await websocket.send_text(text)
 
 realtime_broadcaster = RealtimeBroadcaster()
@@ -4,14 +4,74 @@ from __future__ import annotations
 
 import asyncio
 import secrets
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
 
 from .realtime_bus import RealtimeBroadcaster, realtime_broadcaster
 
 
+# Completed/failed records are kept this long (and at most this many) for lookups.
+_FINISHED_TTL_SECONDS = 3600.0
+_MAX_FINISHED_REQUESTS = 1000
+
+# (epoch second, formatted timestamp); replaced as one tuple so readers never see a torn pair.
+_ts_cache: Tuple[int, str] = (-1, "")
+
+
 def _utc_timestamp() -> str:
-    return datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
+    # Second resolution, so format at most once per second.
+    global _ts_cache
+    second = int(time.time())
+    cached_second, cached_value = _ts_cache
+    if second == cached_second:
+        return cached_value
+    value = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(second))
+    _ts_cache = (second, value)
+    return value
+
+
+@dataclass(slots=True)
+class ScreenshotRecord:
+    """State of one screenshot request; slots keep long request histories compact."""
+
+    id: str
+    status: str
+    created_at: str
+    updated_at: str
+    metadata: Dict[str, Any]
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    target_client_id: Optional[str] = None
+    processed_by: Optional[str] = None
+    sound_effect: Optional[Dict[str, Any]] = None
+    # Prebuilt screenshot_request message, shared by the create broadcast and every replay.
+    wire: Dict[str, Any] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.wire = {
+            "type": "screenshot_request",
+            "request_id": self.id,
+            "metadata": self.metadata,
+            "target_client_id": self.target_client_id,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Snapshot in the dict shape returned by the API (sound_effect only once attached)."""
+        data = {
+            "id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "metadata": self.metadata,
+            "result": self.result,
+            "error": self.error,
+            "target_client_id": self.target_client_id,
+            "processed_by": self.processed_by,
+        }
+        if self.sound_effect is not None:
+            data["sound_effect"] = self.sound_effect
+        return data
 
 
 class ScreenshotRequestQueue:
@@ -19,7 +79,11 @@ class ScreenshotRequestQueue:
 
     def __init__(self, broadcaster: RealtimeBroadcaster | None = None) -> None:
         self._lock = asyncio.Lock()
-        self._requests: Dict[str, Dict[str, Any]] = {}
+        self._requests: Dict[str, ScreenshotRecord] = {}
+        # Ids of requests still pending, in creation order (dict used as an ordered set).
+        self._pending_ids: Dict[str, None] = {}
+        # Finished request id -> time.monotonic() when it finished, oldest first.
+        self._finished: Dict[str, float] = {}
         self._broadcaster = broadcaster
 
     def set_broadcaster(self, broadcaster: RealtimeBroadcaster | None) -> None:
@@ -39,30 +103,21 @@ class ScreenshotRequestQueue:
             else:
                 target_client_id = None
                 meta_copy.pop("client_id", None)
-        record = {
-            "id": request_id,
-            "status": "pending",
-            "created_at": now,
-            "updated_at": now,
-            "metadata": meta_copy,
-            "result": None,
-            "error": None,
-            "target_client_id": target_client_id,
-            "processed_by": None,
-        }
+        record = ScreenshotRecord(
+            id=request_id,
+            status="pending",
+            created_at=now,
+            updated_at=now,
+            metadata=meta_copy,
+            target_client_id=target_client_id,
+        )
         async with self._lock:
+            self._evict_finished()
             self._requests[request_id] = record
+            self._pending_ids[request_id] = None
 
-        await self._emit(
-            {
-                "type": "screenshot_request",
-                "request_id": request_id,
-                "metadata": meta_copy,
-                "target_client_id": target_client_id,
-            },
-            target_client_id=target_client_id,
-        )
-        return dict(record)
+        await self._emit(record.wire, target_client_id=target_client_id)
+        return record.to_dict()
 
     async def mark_completed(
         self,
@@ -74,16 +129,17 @@ class ScreenshotRequestQueue:
             record = self._requests.get(request_id)
             if record is None:
                 return None
-            record["status"] = "completed"
-            record["result"] = result
-            record["error"] = None
-            record["updated_at"] = _utc_timestamp()
-            record["processed_by"] = processed_by
-            snapshot = dict(record)
+            record.status = "completed"
+            self._mark_finished(request_id)
+            record.result = result
+            record.error = None
+            record.updated_at = _utc_timestamp()
+            record.processed_by = processed_by
+            snapshot = record.to_dict()
 
         await self._emit(
             {"type": "screenshot_completed", "request_id": request_id},
-            target_client_id=record.get("target_client_id"),
+            target_client_id=record.target_client_id,
         )
         return snapshot
 
@@ -97,15 +153,16 @@ class ScreenshotRequestQueue:
             record = self._requests.get(request_id)
             if record is None:
                 return None
-            record["status"] = "failed"
-            record["error"] = message
-            record["updated_at"] = _utc_timestamp()
-            record["processed_by"] = processed_by
-            snapshot = dict(record)
+            record.status = "failed"
+            self._mark_finished(request_id)
+            record.error = message
+            record.updated_at = _utc_timestamp()
+            record.processed_by = processed_by
+            snapshot = record.to_dict()
 
         await self._emit(
             {"type": "screenshot_failed", "request_id": request_id, "error": message},
-            target_client_id=record.get("target_client_id"),
+            target_client_id=record.target_client_id,
         )
         return snapshot
 
@@ -116,9 +173,9 @@ class ScreenshotRequestQueue:
             record = self._requests.get(request_id)
             if record is None:
                 return None
-            record["sound_effect"] = sound_result
-            record["updated_at"] = _utc_timestamp()
-            snapshot = dict(record)
+            record.sound_effect = sound_result
+            record.updated_at = _utc_timestamp()
+            snapshot = record.to_dict()
 
         await self._emit(
             {
@@ -130,38 +187,46 @@ class ScreenshotRequestQueue:
                     "output_format": sound_result.get("output_format"),
                 },
             },
-            target_client_id=record.get("target_client_id"),
+            target_client_id=record.target_client_id,
         )
         return snapshot
 
+    # Read paths take no lock: they contain no await, so on the event loop they
+    # cannot interleave with the lock-guarded mutations above.
     async def get_request(self, request_id: str) -> Dict[str, Any] | None:
-        async with self._lock:
-            record = self._requests.get(request_id)
-            if record is None:
-                return None
-            return dict(record)
+        record = self._requests.get(request_id)
+        if record is None:
+            return None
+        return record.to_dict()
 
     async def list_pending_messages(self, client_id: Optional[str] = None) -> List[Dict[str, Any]]:
-        async with self._lock:
-            pending = [
-                dict(rec)
-                for rec in self._requests.values()
-                if rec.get("status") == "pending"
-                and (
-                    rec.get("target_client_id") is None
-                    or rec.get("target_client_id") == client_id
-                )
-            ]
+        # Walk only pending ids and hand out each record's prebuilt message; callers
+        # only serialize these, so they are shared rather than copied.
+        requests = self._requests
         return [
-            {
-                "type": "screenshot_request",
-                "request_id": rec["id"],
-                "metadata": rec.get("metadata", {}),
-                "target_client_id": rec.get("target_client_id"),
-            }
-            for rec in pending
+            rec.wire
+            for rec in (requests[request_id] for request_id in self._pending_ids)
+            if (target := rec.target_client_id) is None or target == client_id
         ]
 
+    def _mark_finished(self, request_id: str) -> None:
+        """Move a request out of the pending index into the eviction order; caller holds the lock."""
+        self._pending_ids.pop(request_id, None)
+        self._finished.pop(request_id, None)
+        self._finished[request_id] = time.monotonic()
+        self._evict_finished()
+
+    def _evict_finished(self) -> None:
+        """Drop finished records past the TTL or over the cap; caller holds the lock."""
+        finished = self._finished
+        cutoff = time.monotonic() - _FINISHED_TTL_SECONDS
+        while finished:
+            request_id, finished_at = next(iter(finished.items()))
+            if finished_at >= cutoff and len(finished) <= _MAX_FINISHED_REQUESTS:
+                break
+            del finished[request_id]
+            self._requests.pop(request_id, None)
+
     async def _emit(self, message: Dict[str, Any], target_client_id: Optional[str]) -> None:
         if self._broadcaster is None:
             return
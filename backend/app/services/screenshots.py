@@ -2,14 +2,20 @@
 
 from __future__ import annotations
 
-import secrets
+import io
+import os
 import shutil
-from datetime import datetime
+import tempfile
+import time
+from functools import lru_cache
 from pathlib import Path
+from typing import BinaryIO
 
 from fastapi import UploadFile
 
 from ..config import settings
+from ..utils.fs import resolved_dir
+from ..utils.tokens import token_hex4
 
 
 _CONTENT_TYPE_EXTENSION_MAP: dict[str, str] = {
@@ -21,37 +27,87 @@ _CONTENT_TYPE_EXTENSION_MAP: dict[str, str] = {
 _FALLBACK_EXTENSIONS: set[str] = {".png", ".jpg", ".jpeg"}
 
 
-def _resolve_extension(upload: UploadFile) -> str:
-    """Pick a safe file extension for the upload based on content type or filename."""
+@lru_cache(maxsize=32)
+def _ext_for(content_type: str | None, filename_suffix: str | None) -> str:
+    """Map a content type / filename suffix pair to the stored extension."""
 
-    if upload.content_type:
-        ext = _CONTENT_TYPE_EXTENSION_MAP.get(upload.content_type.lower())
+    if content_type:
+        ext = _CONTENT_TYPE_EXTENSION_MAP.get(content_type.lower())
         if ext:
             return ext
 
-    if upload.filename:
-        suffix = Path(upload.filename).suffix.lower()
+    if filename_suffix:
+        suffix = filename_suffix.lower()
         if suffix in _FALLBACK_EXTENSIONS:
             return ".jpg" if suffix == ".jpeg" else suffix
 
     raise ValueError("Unsupported screenshot file type")
 
 
+def _resolve_extension(upload: UploadFile) -> str:
+    """Pick a safe file extension for the upload based on content type or filename."""
+
+    suffix = Path(upload.filename).suffix if upload.filename else None
+    return _ext_for(upload.content_type, suffix)
+
+
+_COPY_CHUNK = 1 << 20
+
+
+def _upload_fileno(src: BinaryIO) -> int | None:
+    """Return the OS file descriptor behind src, or None if it has no real one."""
+    if isinstance(src, tempfile.SpooledTemporaryFile) and src.name is None:
+        # Still in memory: fileno() would roll it over to disk just to copy it.
+        return None
+    try:
+        return src.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
+def _copy_upload(src: BinaryIO, dst: BinaryIO) -> None:
+    """Copy the upload into dst, in the kernel when the upload is already on disk.
+
+    Uploads without a real file descriptor (in-memory spools, BytesIO) go
+    through copyfileobj instead.
+    """
+
+    if hasattr(os, "copy_file_range"):
+        src_fd = _upload_fileno(src)
+        if src_fd is not None:
+            try:
+                dst_fd = dst.fileno()
+                while os.copy_file_range(src_fd, dst_fd, _COPY_CHUNK):
+                    pass
+                return
+            except (OSError, io.UnsupportedOperation):
+                # Unsupported by this kernel/filesystem pair: restart with a plain copy.
+                src.seek(0)
+                dst.seek(0)
+                dst.truncate()
+    shutil.copyfileobj(src, dst, _COPY_CHUNK)
+
+
 def save_screenshot(upload: UploadFile) -> dict[str, str]:
     """Persist the uploaded screenshot and return basic metadata."""
 
-    destination_dir = Path(settings.screenshot_dir).expanduser().resolve()
-    destination_dir.mkdir(parents=True, exist_ok=True)
+    destination_dir = resolved_dir(settings.screenshot_dir)
 
     extension = _resolve_extension(upload)
-    timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
-    token = secrets.token_hex(4)
+    timestamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+    token = token_hex4()
     filename = f"scene_{timestamp}_{token}{extension}"
     full_path = destination_dir / filename
 
     upload.file.seek(0)
-    with full_path.open("wb") as f:
-        shutil.copyfileobj(upload.file, f)
+    try:
+        f = full_path.open("wb")
+    except FileNotFoundError:
+        # Directory removed since it was first resolved; recreate it.
+        destination_dir.mkdir(parents=True, exist_ok=True)
+        f = full_path.open("wb")
+    with f:
+        _copy_upload(upload.file, f)
 
     project_root = destination_dir.parent
     try:
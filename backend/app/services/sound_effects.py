@@ -3,52 +3,47 @@
 from __future__ import annotations
 
 import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, Optional
 
 import httpx
 
 from ..config import settings
-from ..utils.fs import ensure_dirs
-from ..utils.metadata import compute_sha256, write_metadata, utc_now_iso_z
+from ..utils.fs import create_unique_file, resolved_dir
+from ..utils.http_client import encode_json_body, stream_post_to_file
+from ..utils.metadata import commit_output_with_metadata, utc_now_iso_z
 
 
 DEFAULT_OUTPUT_FORMAT = "mp3_44100_128"
 DEFAULT_MODEL_ID = "eleven_text_to_sound_v2"
 ELEVEN_BASE_URL = os.getenv("ELEVENLABS_BASE_URL", "https://api.elevenlabs.io")
+_SOUND_GENERATION_URL = f"{ELEVEN_BASE_URL.rstrip('/')}/v1/sound-generation"
+_STATIC_HEADERS = {"Accept": "audio/mpeg", "Content-Type": "application/json"}
 
 
+_CODEC_EXTENSIONS = {
+    "mp3": ".mp3",
+    "pcm": ".wav",
+    "opus": ".opus",
+    "ulaw": ".ulaw",
+    "alaw": ".alaw",
+}
+
+
+@lru_cache(maxsize=32)
 def _resolve_audio_extension(output_format: str) -> str:
     codec = (output_format or DEFAULT_OUTPUT_FORMAT).split("_", 1)[0].lower()
-    return {
-        "mp3": ".mp3",
-        "pcm": ".wav",
-        "opus": ".opus",
-        "ulaw": ".ulaw",
-        "alaw": ".alaw",
-    }.get(codec, ".mp3")
+    return _CODEC_EXTENSIONS.get(codec, ".mp3")
 
 
 def _deduplicate_filename(base_name: str, ext: str, directory: Path) -> Path:
+    """Reserve a unique output file (created empty) in an already-resolved directory."""
     # 僅允許純檔名，避免任何子目錄成分
     safe_base = Path(base_name).name
-    resolved_dir = directory.resolve()
-
-    candidate = resolved_dir / f"{safe_base}{ext}"
-    if not candidate.exists():
-        resolved = candidate.resolve()
-        if resolved.parent != resolved_dir:
-            raise ValueError("非法輸出路徑：越界目錄")
-        return candidate
-    suffix = 2
-    while True:
-        candidate = resolved_dir / f"{safe_base}_{suffix}{ext}"
-        if not candidate.exists():
-            resolved = candidate.resolve()
-            if resolved.parent != resolved_dir:
-                raise ValueError("非法輸出路徑：越界目錄")
-            return candidate
-        suffix += 1
+    if not safe_base:
+        raise ValueError("非法輸出路徑：越界目錄")
+    return create_unique_file(directory, safe_base, ext)
 
 
 def _resolve_base_name(image_path: str | Path, fallback: Optional[str] = None) -> str:
@@ -102,11 +97,9 @@ def generate_sound_effect(
     target_format = output_format or DEFAULT_OUTPUT_FORMAT
     audio_ext = _resolve_audio_extension(target_format)
 
-    output_dir = Path(settings.generated_sounds_dir)
-    ensure_dirs([str(output_dir)])
+    output_dir = resolved_dir(settings.generated_sounds_dir)
 
     base_name = _resolve_base_name(image_path, fallback=request_id)
-    output_path = _deduplicate_filename(base_name, audio_ext, output_dir)
 
     payload: Dict[str, Any] = {
         "text": prompt.strip(),
@@ -121,33 +114,36 @@ def generate_sound_effect(
 
     params = {"output_format": target_format} if target_format else None
 
-    headers = {
-        "xi-api-key": api_key,
-        "Accept": "audio/mpeg",
-        "Content-Type": "application/json",
-    }
-
-    url = f"{ELEVEN_BASE_URL.rstrip('/')}/v1/sound-generation"
-
-    with httpx.Client(timeout=timeout) as client:
-        response = client.post(url, headers=headers, params=params, json=payload)
-        try:
-            response.raise_for_status()
-        except httpx.HTTPStatusError as exc:
-            detail = exc.response.text
-            raise RuntimeError(f"ElevenLabs sound generation 失敗：{exc.response.status_code} {detail}") from exc
+    headers = {**_STATIC_HEADERS, "xi-api-key": api_key}
 
-        audio_bytes = response.content
-
-    output_path.write_bytes(audio_bytes)
+    try:
+        # 回應邊下載邊寫入暫存檔並計算 checksum，不在記憶體保留整段音訊
+        staged_path, size_bytes, checksum = stream_post_to_file(
+            _SOUND_GENERATION_URL,
+            str(output_dir),
+            timeout=timeout,
+            fsync=settings.fsync_outputs,
+            headers=headers,
+            params=params,
+            content=encode_json_body(payload),
+        )
+    except httpx.HTTPStatusError as exc:
+        detail = exc.response.text
+        raise RuntimeError(f"ElevenLabs sound generation 失敗：{exc.response.status_code} {detail}") from exc
+
+    # 取得音訊後才保留檔名，避免請求失敗時留下空檔
+    try:
+        output_path = _deduplicate_filename(base_name, audio_ext, output_dir)
+    except Exception:
+        os.remove(staged_path)
+        raise
 
     relative_path: str | None = None
     try:
-        relative_path = str(output_path.relative_to(Path(settings.generated_sounds_dir).parent))
+        relative_path = str(output_path.relative_to(output_dir.parent))
     except ValueError:
         relative_path = str(output_path)
 
-    stat = output_path.stat()
     metadata = {
         "kind": "sound_effect",
         "provider": "elevenlabs",
@@ -163,10 +159,21 @@ def generate_sound_effect(
         "output_audio": output_path.name,
         "absolute_path": str(output_path),
         "relative_path": relative_path,
-        "size_bytes": stat.st_size,
-        "checksum_sha256": compute_sha256(output_path),
+        "size_bytes": size_bytes,
+        "checksum_sha256": checksum,
     }
-    metadata_path = write_metadata(metadata, base_name=output_path.name)
+    try:
+        # 音檔與 metadata 一起以暫存檔寫入後 rename，避免只出現其中之一
+        metadata_path = commit_output_with_metadata(
+            staged_path,
+            output_path,
+            metadata,
+            base_name=output_path.name,
+            fsync=settings.fsync_outputs,
+        )
+    except Exception:
+        output_path.unlink(missing_ok=True)
+        raise
 
     return {
         "request_id": request_id,
@@ -179,7 +186,7 @@ def generate_sound_effect(
         "filename": output_path.name,
         "absolute_path": str(output_path),
         "relative_path": relative_path,
-        "size_bytes": stat.st_size,
-        "checksum_sha256": metadata["checksum_sha256"],
+        "size_bytes": size_bytes,
+        "checksum_sha256": checksum,
         "metadata_path": metadata_path,
     }
@@ -2,38 +2,21 @@
 
 from __future__ import annotations
 
-from typing import Dict, Optional
-
 from .timed_text import TimedTextManager
 
 
-class SubtitleManager:
+class SubtitleManager(TimedTextManager):
     def __init__(self) -> None:
-        self._manager = TimedTextManager(
+        super().__init__(
             default_duration=30.0,
             empty_error_message="subtitle text cannot be empty",
         )
 
-    async def set_subtitle(
-        self,
-        text: str,
-        *,
-        language: Optional[str] = None,
-        duration_seconds: Optional[float] = None,
-        target_client_id: Optional[str] = None,
-    ) -> Dict[str, Any]:
-        return await self._manager.set_text(
-            text,
-            language=language,
-            duration_seconds=duration_seconds,
-            target_client_id=target_client_id,
-        )
-
-    async def clear_subtitle(self, target_client_id: Optional[str] = None) -> None:
-        await self._manager.clear_text(target_client_id)
-
-    async def get_subtitle(self, client_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
-        return await self._manager.get_text(client_id)
+    # Subtitle-named entry points are the TimedTextManager methods themselves,
+    # not wrappers, so each call is a single coroutine.
+    set_subtitle = TimedTextManager.set_text
+    clear_subtitle = TimedTextManager.clear_text
+    get_subtitle = TimedTextManager.get_text
 
 
 subtitle_manager = SubtitleManager()
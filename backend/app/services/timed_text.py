@@ -2,8 +2,8 @@
 
 from __future__ import annotations
 
-import asyncio
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, Optional
 
@@ -12,32 +12,51 @@ def _now() -> datetime:
     return datetime.now(timezone.utc)
 
 
+# Expiry is checked against this clock so reads never build a datetime.
+_monotonic = time.monotonic
+
+
 def _to_iso(dt: Optional[datetime]) -> Optional[str]:
     if dt is None:
         return None
     return dt.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TimedTextState:
     text: str
     language: Optional[str]
     duration_seconds: Optional[float]
     expires_at: Optional[datetime]
     updated_at: datetime
+    expires_monotonic: Optional[float] = None
+    # Built once (timestamps included) and handed out on every read; callers
+    # only serialize it, never mutate it.
+    payload: Dict[str, Any] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(
+            self,
+            "payload",
+            {
+                "text": self.text,
+                "language": self.language,
+                "duration_seconds": self.duration_seconds,
+                "expires_at": _to_iso(self.expires_at),
+                "updated_at": _to_iso(self.updated_at),
+            },
+        )
 
     def to_payload(self) -> Dict[str, Any]:
-        return {
-            "text": self.text,
-            "language": self.language,
-            "duration_seconds": self.duration_seconds,
-            "expires_at": _to_iso(self.expires_at),
-            "updated_at": _to_iso(self.updated_at),
-        }
+        return self.payload
 
 
 class TimedTextManager:
-    """In-memory storage for timed text with optional expiration."""
+    """In-memory storage for timed text with optional expiration.
+
+    No lock is needed: no method awaits, so on the event loop each call runs
+    to completion without interleaving with another.
+    """
 
     def __init__(
         self,
@@ -45,7 +64,6 @@ class TimedTextManager:
         default_duration: Optional[float] = None,
         empty_error_message: str = "text cannot be empty",
     ) -> None:
-        self._lock = asyncio.Lock()
         self._default_duration = default_duration
         self._empty_error_message = empty_error_message
         self._global_state: Optional[TimedTextState] = None
@@ -98,6 +116,7 @@ class TimedTextManager:
 
         now = _now()
         duration_value, expires_at = self._compute_duration(duration_seconds, now=now)
+        expires_monotonic = _monotonic() + duration_value if expires_at is not None else None
 
         new_state = TimedTextState(
             text=cleaned,
@@ -105,38 +124,36 @@ class TimedTextManager:
             duration_seconds=duration_value,
             expires_at=expires_at,
             updated_at=now,
+            expires_monotonic=expires_monotonic,
         )
 
-        async with self._lock:
-            if target_client_id:
-                self._client_states[target_client_id] = new_state
-            else:
-                self._global_state = new_state
-            return new_state.to_payload()
+        if target_client_id:
+            self._client_states[target_client_id] = new_state
+        else:
+            self._global_state = new_state
+        return new_state.to_payload()
 
     async def clear_text(self, target_client_id: Optional[str] = None) -> None:
-        async with self._lock:
-            if target_client_id:
-                if target_client_id in self._client_states:
-                    self._client_states[target_client_id] = None
-            else:
-                self._global_state = None
+        if target_client_id:
+            if target_client_id in self._client_states:
+                self._client_states[target_client_id] = None
+        else:
+            self._global_state = None
 
     async def get_text(self, client_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
-        now = _now()
-        async with self._lock:
-            if client_id and client_id in self._client_states:
-                state = self._client_states[client_id]
-                if state is not None:
-                    if state.expires_at and state.expires_at <= now:
-                        self._client_states[client_id] = None
-                        return None
-                    return state.to_payload()
-
-            state = self._global_state
-            if state is None:
-                return None
-            if state.expires_at and state.expires_at <= now:
-                self._global_state = None
-                return None
-            return state.to_payload()
+        now = _monotonic()
+        if client_id:
+            state = self._client_states.get(client_id)
+            if state is not None:
+                if state.expires_monotonic is not None and state.expires_monotonic <= now:
+                    self._client_states[client_id] = None
+                    return None
+                return state.to_payload()
+
+        state = self._global_state
+        if state is None:
+            return None
+        if state.expires_monotonic is not None and state.expires_monotonic <= now:
+            self._global_state = None
+            return None
+        return state.to_payload()
@@ -9,8 +9,9 @@ sound file serving endpoints.
 from __future__ import annotations
 
 import os
-import secrets
-from datetime import datetime, timezone
+import string
+import time
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, Optional
 import re
@@ -18,51 +19,50 @@ import re
 import httpx
 
 from ..config import settings
-from ..utils.fs import ensure_dirs
-from ..utils.metadata import compute_sha256, write_metadata, utc_now_iso_z
+from ..utils.fs import create_unique_file, resolved_dir
+from ..utils.http_client import encode_json_body, stream_post_to_file
+from ..utils.metadata import commit_output_with_metadata, utc_now_iso_z
+from ..utils.tokens import token_hex4
 
 
 DEFAULT_TTS_MODEL = "gpt-4o-mini-tts"
 DEFAULT_VOICE = "alloy"
 DEFAULT_FORMAT = "mp3"  # mp3|wav|opus|aac|flac (OpenAI-supported)
+_STATIC_HEADERS = {"Content-Type": "application/json"}
+# Prefer the classic Audio Speech endpoint for simplicity and stability.
+_SPEECH_URL = f"{os.getenv('OPENAI_API_BASE', 'https://api.openai.com').rstrip('/')}/v1/audio/speech"
 
 
 def _utc_compact_timestamp() -> str:
-    return datetime.now(tz=timezone.utc).strftime("%Y%m%dT%H%M%S")
+    return time.strftime("%Y%m%dT%H%M%S", time.gmtime())
 
 
+_FORMAT_EXTENSIONS = {
+    "mp3": ".mp3",
+    "wav": ".wav",
+    "opus": ".opus",
+    "aac": ".aac",
+    "flac": ".flac",
+}
+
+
+@lru_cache(maxsize=32)
 def _resolve_audio_extension(fmt: str) -> str:
-    mapping = {
-        "mp3": ".mp3",
-        "wav": ".wav",
-        "opus": ".opus",
-        "aac": ".aac",
-        "flac": ".flac",
-    }
     key = (fmt or DEFAULT_FORMAT).lower().strip()
-    return mapping.get(key, ".mp3")
+    return _FORMAT_EXTENSIONS.get(key, ".mp3")
 
 
 def _deduplicate_filename(base_name: str, ext: str, directory: Path) -> Path:
+    """Reserve a unique output file (created empty) in an already-resolved directory."""
     # 僅允許純檔名，避免任何子目錄成分
     safe_base = Path(base_name).name
-    resolved_dir = directory.resolve()
-
-    candidate = resolved_dir / f"{safe_base}{ext}"
-    if not candidate.exists():
-        resolved = candidate.resolve()
-        if resolved.parent != resolved_dir:
-            raise ValueError("非法輸出路徑：越界目錄")
-        return candidate
-    suffix = 2
-    while True:
-        alt = resolved_dir / f"{safe_base}_{suffix}{ext}"
-        if not alt.exists():
-            resolved = alt.resolve()
-            if resolved.parent != resolved_dir:
-                raise ValueError("非法輸出路徑：越界目錄")
-            return alt
-        suffix += 1
+    if not safe_base:
+        raise ValueError("非法輸出路徑：越界目錄")
+    return create_unique_file(directory, safe_base, ext)
+
+
+_UNSAFE_FILENAME_RE = re.compile(r"[^A-Za-z0-9._-]")
+_SAFE_FILENAME_CHARS = frozenset(string.ascii_letters + string.digits + "._-")
 
 
 def _sanitize_base_filename(name: str | None) -> str:
@@ -81,8 +81,9 @@ def _sanitize_base_filename(name: str | None) -> str:
     cleaned = Path(str(name)).name
     # 移除 NUL 與不可見字元
     cleaned = cleaned.replace("\x00", "")
-    # 僅允許安全字元
-    cleaned = re.sub(r"[^A-Za-z0-9._-]", "_", cleaned)
+    # 僅允許安全字元（多數呼叫端給的已是安全名稱，直接略過 regex）
+    if not _SAFE_FILENAME_CHARS.issuperset(cleaned):
+        cleaned = _UNSAFE_FILENAME_RE.sub("_", cleaned)
     # 避免隱藏檔或 '.'、'..'
     cleaned = cleaned.lstrip('.')
     # 長度限制
@@ -129,25 +130,15 @@ def synthesize_speech_openai(
     fmt = (output_format or getattr(settings, "openai_tts_format", None) or DEFAULT_FORMAT).strip().lower()
     audio_ext = _resolve_audio_extension(fmt)
 
-    out_dir = Path(settings.generated_sounds_dir)
-    ensure_dirs([str(out_dir)])
+    out_dir = resolved_dir(settings.generated_sounds_dir)
 
     base = _sanitize_base_filename(filename_base)
     if not base:
         ts = _utc_compact_timestamp()
-        rand = secrets.token_hex(4)
+        rand = token_hex4()
         base = f"narration_{ts}_{rand}"
 
-    output_path = _deduplicate_filename(base, audio_ext, out_dir)
-
-    # Prefer the classic Audio Speech endpoint for simplicity and stability.
-    api_base = os.getenv("OPENAI_API_BASE", "https://api.openai.com")
-    url = f"{api_base.rstrip('/')}/v1/audio/speech"
-
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
+    headers = {**_STATIC_HEADERS, "Authorization": f"Bearer {api_key}"}
 
     payload: Dict[str, Any] = {
         "model": target_model,
@@ -161,48 +152,57 @@ def synthesize_speech_openai(
     if isinstance(speed, (int, float)):
         payload["speed"] = float(speed)
 
-    with httpx.Client(timeout=timeout) as client:
-        resp = client.post(url, headers=headers, json=payload)
-        try:
-            resp.raise_for_status()
-        except httpx.HTTPStatusError as exc:
-            status = exc.response.status_code
-            detail = exc.response.text
-            # 若 instructions 造成 4xx，嘗試移除後回退一次
-            if 400 <= status < 500 and send_instructions:
-                txt = (detail or "").lower()
-                if "instruction" in txt or "unknown field" in txt or "invalid" in txt:
-                    payload_no_instr = dict(payload)
-                    payload_no_instr.pop("instructions", None)
-                    resp2 = client.post(url, headers=headers, json=payload_no_instr)
-                    try:
-                        resp2.raise_for_status()
-                    except httpx.HTTPStatusError as exc2:
-                        st2 = exc2.response.status_code
-                        dt2 = exc2.response.text
-                        if 400 <= st2 < 500:
-                            raise ValueError(f"OpenAI TTS 請求無效：{st2} {dt2}") from exc2
-                        raise RuntimeError(f"OpenAI TTS 失敗：{st2} {dt2}") from exc2
-                    audio_bytes = resp2.content
-                else:
-                    # 其他 4xx 錯誤
-                    raise ValueError(f"OpenAI TTS 請求無效：{status} {detail}") from exc
+    def _post(body: Dict[str, Any]):
+        # 回應邊下載邊寫入暫存檔並計算 checksum，不在記憶體保留整段音訊
+        return stream_post_to_file(
+            _SPEECH_URL,
+            str(out_dir),
+            timeout=timeout,
+            fsync=settings.fsync_outputs,
+            headers=headers,
+            content=encode_json_body(body),
+        )
+
+    try:
+        staged_path, size_bytes, checksum = _post(payload)
+    except httpx.HTTPStatusError as exc:
+        status = exc.response.status_code
+        detail = exc.response.text
+        # 若 instructions 造成 4xx，嘗試移除後回退一次
+        if 400 <= status < 500 and send_instructions:
+            txt = (detail or "").lower()
+            if "instruction" in txt or "unknown field" in txt or "invalid" in txt:
+                payload_no_instr = dict(payload)
+                payload_no_instr.pop("instructions", None)
+                try:
+                    staged_path, size_bytes, checksum = _post(payload_no_instr)
+                except httpx.HTTPStatusError as exc2:
+                    st2 = exc2.response.status_code
+                    dt2 = exc2.response.text
+                    if 400 <= st2 < 500:
+                        raise ValueError(f"OpenAI TTS 請求無效：{st2} {dt2}") from exc2
+                    raise RuntimeError(f"OpenAI TTS 失敗：{st2} {dt2}") from exc2
             else:
-                # 非 4xx 或沒有 instructions 的情況
-                if 400 <= status < 500:
-                    raise ValueError(f"OpenAI TTS 請求無效：{status} {detail}") from exc
-                raise RuntimeError(f"OpenAI TTS 失敗：{status} {detail}") from exc
+                # 其他 4xx 錯誤
+                raise ValueError(f"OpenAI TTS 請求無效：{status} {detail}") from exc
         else:
-            audio_bytes = resp.content
+            # 非 4xx 或沒有 instructions 的情況
+            if 400 <= status < 500:
+                raise ValueError(f"OpenAI TTS 請求無效：{status} {detail}") from exc
+            raise RuntimeError(f"OpenAI TTS 失敗：{status} {detail}") from exc
 
-    output_path.write_bytes(audio_bytes)
+    # 取得音訊後才保留檔名，避免請求失敗時留下空檔
+    try:
+        output_path = _deduplicate_filename(base, audio_ext, out_dir)
+    except Exception:
+        os.remove(staged_path)
+        raise
 
     try:
-        relative_path = str(output_path.relative_to(Path(settings.generated_sounds_dir).parent))
+        relative_path = str(output_path.relative_to(out_dir.parent))
     except ValueError:
         relative_path = str(output_path)
 
-    stat = output_path.stat()
     metadata = {
         "kind": "tts",
         "provider": "openai",
@@ -216,10 +216,21 @@ def synthesize_speech_openai(
         "output_audio": output_path.name,
         "absolute_path": str(output_path),
         "relative_path": relative_path,
-        "size_bytes": stat.st_size,
-        "checksum_sha256": compute_sha256(output_path),
+        "size_bytes": size_bytes,
+        "checksum_sha256": checksum,
     }
-    metadata_path = write_metadata(metadata, base_name=output_path.name)
+    try:
+        # 音檔與 metadata 一起以暫存檔寫入後 rename，避免只出現其中之一
+        metadata_path = commit_output_with_metadata(
+            staged_path,
+            output_path,
+            metadata,
+            base_name=output_path.name,
+            fsync=settings.fsync_outputs,
+        )
+    except Exception:
+        output_path.unlink(missing_ok=True)
+        raise
 
     return {
         "text": cleaned,
@@ -231,7 +242,7 @@ def synthesize_speech_openai(
         "filename": output_path.name,
         "absolute_path": str(output_path),
         "relative_path": relative_path,
-        "size_bytes": stat.st_size,
-        "checksum_sha256": metadata["checksum_sha256"],
+        "size_bytes": size_bytes,
+        "checksum_sha256": checksum,
         "metadata_path": metadata_path,
     }
@@ -10,15 +10,20 @@ All vectors are produced externally (Google GenAI); we pass them to Chroma
 via `embeddings=` to avoid relying on an internal embedding function.
 """
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 from functools import lru_cache
 
 import chromadb
+from PIL import Image
 from chromadb.api.types import Documents, Embeddings, IDs, Metadatas
 
 from ..config import settings
+from ..utils.fs import listing_is_settled
+from ..utils.metadata import compute_sha256
+from . import embedding_cache
 from ..utils.embeddings import (
     embed_text,
     embed_image,
@@ -26,6 +31,8 @@ from ..utils.embeddings import (
     caption_image,
 )
 import os
+import random
+import time
 
 
 _client: chromadb.ClientAPI | None = None
@@ -71,36 +78,25 @@ def _offspring_path_from_basename(name: str) -> Path:
     return Path(settings.offspring_dir) / name
 
 
-def index_offspring_image(basename: str, *, force: bool = False) -> Dict[str, Any]:
-    """Compute embedding for a single offspring image and upsert into Chroma."""
-    col = get_images_collection()
+def _sanitize_meta_value(value: Any) -> Any:
+    # Chroma requires scalar types (str, int, float, bool, None)
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    try:
+        import json as _json
+        return _json.dumps(value, ensure_ascii=False)
+    except Exception:
+        return str(value)
+
+
+def _compute_vec_and_meta(basename: str) -> Tuple[str, List[float], Dict[str, Any]]:
+    """Embed one offspring image and build its Chroma metadata (no DB writes)."""
     image_path = _offspring_path_from_basename(basename)
     if not image_path.exists():
         raise FileNotFoundError(f"offspring image not found: {image_path}")
 
-    # Use basename as id (unique in our dataset)
-    doc_id = basename
-
-    exists = col.get(ids=[doc_id])
-    if not force and (exists and len(exists.get("ids", [])) > 0):
-        return {"id": doc_id, "status": "exists"}
-
-    # Prefer true image embeddings if a supported image model exists; otherwise caption->text embedding
-    try:
-        vec = embed_image(str(image_path))
-    except Exception:
-        # Fallback to captioning + text embedding
-        # Optionally include a short hint from metadata
-        hint = None
-        meta_json = Path(settings.metadata_dir) / f"{image_path.stem}.json"
-        if meta_json.exists():
-            try:
-                import json
-                md = json.loads(meta_json.read_text(encoding="utf-8"))
-                hint = md.get("prompt") or None
-            except Exception:
-                pass
-        vec = embed_image_as_text(str(image_path), extra_hint=hint)
+    vec = _embed_image_cached(image_path)
+    _record_perceptual_hash(basename, image_path)
 
     # Prepare metadata by reading companion JSON if available
     meta: Dict[str, Any] = {"path": str(image_path)}
@@ -119,18 +115,25 @@ def index_offspring_image(basename: str, *, force: bool = False) -> Dict[str, An
     if deprecated_dir.exists() and str(image_path).startswith(str(deprecated_dir)):
         meta["deprecated"] = True
 
-    def _sanitize(value: Any) -> Any:
-        # Chroma requires scalar types (str, int, float, bool, None)
-        if value is None or isinstance(value, (str, int, float, bool)):
-            return value
-        try:
-            import json as _json
-            return _json.dumps(value, ensure_ascii=False)
-        except Exception:
-            return str(value)
+    meta = {k: _sanitize_meta_value(v) for k, v in meta.items()}
+    # Use basename as id (unique in our dataset)
+    return basename, vec, meta
 
-    meta = {k: _sanitize(v) for k, v in meta.items()}
 
+def index_offspring_image(basename: str, *, force: bool = False) -> Dict[str, Any]:
+    """Compute embedding for a single offspring image and upsert into Chroma."""
+    col = get_images_collection()
+    image_path = _offspring_path_from_basename(basename)
+    if not image_path.exists():
+        raise FileNotFoundError(f"offspring image not found: {image_path}")
+
+    doc_id = basename
+
+    exists = col.get(ids=[doc_id])
+    if not force and (exists and len(exists.get("ids", [])) > 0):
+        return {"id": doc_id, "status": "exists"}
+
+    doc_id, vec, meta = _compute_vec_and_meta(basename)
     col.upsert(
         ids=[doc_id],
         embeddings=[vec],
@@ -140,24 +143,50 @@ def index_offspring_image(basename: str, *, force: bool = False) -> Dict[str, An
     return {"id": doc_id, "status": "indexed", "dim": len(vec)}
 
 
+# (目錄路徑, 目錄 mtime_ns, 排序後的檔案清單)；目錄內容變動時 mtime 會更新
+_listing_cache: Tuple[str, int, int, List[Path]] | None = None
+
+
 def _iter_offspring_images(limit: Optional[int] = None) -> Optional[List[Path]]:
     """Return filtered offspring image paths in sorted order.
 
     None is returned when the offspring directory is missing so that callers can
     preserve their historical return structure (which skipped the results list).
+    The sorted listing is cached until the directory's mtime changes, so
+    paginated batch calls do not rescan and resort the whole directory; callers
+    must not mutate the returned list. A listing taken within the directory's
+    mtime tick is never reused, since a file created in that same tick would not
+    advance the mtime on filesystems with coarse timestamps.
     """
+    global _listing_cache
 
-    image_dir = Path(settings.offspring_dir)
-    if not image_dir.exists():
+    image_dir = settings.offspring_dir
+    try:
+        mtime_ns = os.stat(image_dir).st_mtime_ns
+    except FileNotFoundError:
         return None
 
-    # 大小寫不敏感的副檔名檢查
-    ext_lower = {ext.lower() for ext in _IMAGE_EXTENSIONS}
-    files = sorted(
-        p
-        for p in image_dir.iterdir()
-        if p.is_file() and p.suffix.lower() in ext_lower
-    )
+    cached = _listing_cache
+    if (
+        cached is not None
+        and cached[0] == image_dir
+        and cached[1] == mtime_ns
+        and listing_is_settled(mtime_ns, cached[2])
+    ):
+        files = cached[3]
+    else:
+        scanned_at = time.time_ns()
+        # 大小寫不敏感的副檔名檢查；scandir 的 is_file() 多半不需額外 stat
+        ext_lower = {ext.lower() for ext in _IMAGE_EXTENSIONS}
+        with os.scandir(image_dir) as entries:
+            names = sorted(
+                entry.name
+                for entry in entries
+                if os.path.splitext(entry.name)[1].lower() in ext_lower and entry.is_file()
+            )
+        base = Path(image_dir)
+        files = [base / name for name in names]
+        _listing_cache = (image_dir, mtime_ns, scanned_at, files)
 
     if limit is not None:
         if limit <= 0:
@@ -167,27 +196,87 @@ def _iter_offspring_images(limit: Optional[int] = None) -> Optional[List[Path]]:
     return files
 
 
+# 每次 upsert 的筆數；單筆 upsert 各自是一個 SQLite transaction，批次寫入可攤平成本
+_UPSERT_BATCH_SIZE = 200
+# 同時進行的 embedding API 呼叫數；呼叫以網路延遲為主，少量並行即可明顯縮短總時間
+_EMBED_MAX_WORKERS = 5
+# 每個 embedding 呼叫前的隨機延遲上限（秒），避免同時發出造成 429
+_EMBED_JITTER_SECONDS = 0.05
+
+
+def _compute_with_jitter(name: str) -> Tuple[str, List[float], Dict[str, Any]]:
+    if _EMBED_JITTER_SECONDS > 0:
+        time.sleep(random.uniform(0, _EMBED_JITTER_SECONDS))
+    return _compute_vec_and_meta(name)
+
+
 def _index_files(files: Iterable[Path], *, force: bool) -> Dict[str, Any]:
-    """Index files while accumulating shared statistics and error handling."""
+    """Index files while accumulating shared statistics and error handling.
 
-    indexed = 0
-    skipped = 0
-    errors = 0
+    Existing ids are fetched with one ``col.get`` per ``_UPSERT_BATCH_SIZE``
+    names; embeddings are computed on a small thread pool while Chroma writes
+    stay on the calling thread, one ``col.upsert`` per ``_UPSERT_BATCH_SIZE``
+    items.
+    """
+
+    names = [Path(item).name for item in files]
     results: List[Dict[str, Any]] = []
+    if not names:
+        return {"indexed": 0, "skipped": 0, "errors": 0, "results": results}
 
-    for item in files:
-        path = Path(item)
+    col = get_images_collection()
+    existing: set[str] = set()
+    if not force:
+        # 分批查詢，避免一次帶入過多 id 超出 SQLite 綁定參數上限
+        for start in range(0, len(names), _UPSERT_BATCH_SIZE):
+            found = col.get(ids=names[start:start + _UPSERT_BATCH_SIZE], include=[])
+            existing.update((found or {}).get("ids") or [])
+
+    # (results 索引, id, 向量, metadata)
+    pending: List[Tuple[int, str, List[float], Dict[str, Any]]] = []
+
+    def _flush() -> None:
+        if not pending:
+            return
         try:
-            res = index_offspring_image(path.name, force=force)
-            if res.get("status") == "indexed":
-                indexed += 1
-            else:
-                skipped += 1
-            results.append(res)
+            col.upsert(
+                ids=[doc_id for _, doc_id, _, _ in pending],
+                embeddings=[vec for _, _, vec, _ in pending],
+                metadatas=[meta for _, _, _, meta in pending],
+                documents=None,
+            )
         except Exception as exc:  # noqa: BLE001
-            errors += 1
-            results.append({"id": path.name, "status": "error", "error": str(exc)})
-
+            for idx, doc_id, _, _ in pending:
+                results[idx] = {"id": doc_id, "status": "error", "error": str(exc)}
+        pending.clear()
+
+    todo: List[Tuple[int, str]] = []
+    for name in names:
+        if name in existing:
+            results.append({"id": name, "status": "exists"})
+        else:
+            todo.append((len(results), name))
+            results.append({"id": name, "status": "pending"})
+
+    if todo:
+        with ThreadPoolExecutor(max_workers=min(_EMBED_MAX_WORKERS, len(todo))) as pool:
+            futures = {pool.submit(_compute_with_jitter, name): (idx, name) for idx, name in todo}
+            for future in as_completed(futures):
+                idx, name = futures[future]
+                try:
+                    doc_id, vec, meta = future.result()
+                except Exception as exc:  # noqa: BLE001
+                    results[idx] = {"id": name, "status": "error", "error": str(exc)}
+                    continue
+                pending.append((idx, doc_id, vec, meta))
+                results[idx] = {"id": doc_id, "status": "indexed", "dim": len(vec)}
+                if len(pending) >= _UPSERT_BATCH_SIZE:
+                    _flush()
+    _flush()
+
+    indexed = sum(1 for r in results if r["status"] == "indexed")
+    errors = sum(1 for r in results if r["status"] == "error")
+    skipped = len(results) - indexed - errors
     return {"indexed": indexed, "skipped": skipped, "errors": errors, "results": results}
 
 
@@ -429,7 +518,13 @@ def search_images_by_image(image_path: str, top_k: int = 10, include_deprecated:
                 # 都不存在，拋出錯誤
                 raise FileNotFoundError(f"檔案不存在: {original_path}")
         
-        vec = _cached_embed_image_for_search(path)
+        # 先查內容雜湊的精確快取；未命中才做較昂貴的近似查詢（解碼 + 漢明距離掃描）
+        vec = _lookup_cached_image_embedding(path)
+        if vec is None:
+            # 與已索引圖像視覺上幾乎相同（重新存檔、去除 EXIF）時沿用其向量，不呼叫 API
+            vec = _vector_from_similar_image(col, path)
+        if vec is None:
+            vec = _cached_embed_image_for_search(path)
     
     # 過濾 deprecated 圖片（除非明確要求包含）
     where_clause = None
@@ -452,15 +547,13 @@ def search_images_by_image(image_path: str, top_k: int = 10, include_deprecated:
     return {"results": out}
 
 
-def _embed_image_for_search(image_path: str) -> List[float]:
-    """為搜尋目的進行圖像 embedding。
-    
-    包含回退邏輯：主要方法失敗時回退到標題 + 文字 embedding。
-    """
+def _embed_image_uncached(image_path: str) -> List[float]:
+    # Prefer true image embeddings if a supported image model exists; otherwise caption->text embedding
     try:
         vec = embed_image(image_path)
     except Exception:
         # Fallback: caption + text embedding
+        # Optionally include a short hint from metadata
         hint = None
         meta_json = Path(settings.metadata_dir) / f"{Path(image_path).stem}.json"
         if meta_json.exists():
@@ -474,6 +567,83 @@ def _embed_image_for_search(image_path: str) -> List[float]:
     return vec
 
 
+# 影像向量來自「vision 模型產生描述 → 文字 embedding」；描述提示詞或流程改變時需遞增版本，
+# 讓磁碟快取中的舊向量失效
+_EMBED_PIPELINE_VERSION = "v1"
+
+
+def _embedding_cache_key() -> str:
+    return f"{settings.openai_vision_model}|{settings.openai_embedding_model}|{_EMBED_PIPELINE_VERSION}"
+
+
+def _lookup_cached_image_embedding(image_path: str | Path) -> Optional[List[float]]:
+    """Exact (pipeline, sha256) cache lookup only; never calls the embedding API."""
+    return embedding_cache.get_embedding(_embedding_cache_key(), compute_sha256(image_path))
+
+
+def _embed_image_cached(image_path: str | Path) -> List[float]:
+    """Embed an image, reusing the on-disk cache keyed by (pipeline, sha256 of bytes)."""
+    key = _embedding_cache_key()
+    digest = compute_sha256(image_path)
+    cached = embedding_cache.get_embedding(key, digest)
+    if cached is not None:
+        return cached
+    vec = _embed_image_uncached(str(image_path))
+    embedding_cache.put_embedding(key, digest, vec)
+    return vec
+
+
+# 近似重複判定的 dHash 漢明距離上限（64 位元）
+_PHASH_MAX_DISTANCE = 5
+
+
+def _perceptual_hash(image_path: str | Path) -> int:
+    """64-bit difference hash (dHash): stable across re-encoding and metadata stripping."""
+    with Image.open(image_path) as img:
+        img.draft("L", (64, 64))  # JPEG 可直接以縮小尺寸解碼
+        small = img.convert("L").resize((9, 8), Image.Resampling.LANCZOS)
+    px = small.tobytes()
+    bits = 0
+    for row in range(0, 72, 9):
+        for col in range(row, row + 8):
+            bits = (bits << 1) | (px[col] > px[col + 1])
+    return bits
+
+
+def _record_perceptual_hash(basename: str, image_path: Path) -> None:
+    try:
+        embedding_cache.put_image_hash(basename, _perceptual_hash(image_path))
+    except Exception:
+        # 無法解碼的檔案僅略過近似查詢，不影響索引
+        pass
+
+
+def _vector_from_similar_image(col, image_path: str) -> Optional[List[float]]:
+    """Reuse the stored vector of an indexed image that looks (almost) the same."""
+    try:
+        phash = _perceptual_hash(image_path)
+    except Exception:
+        return None
+    match = embedding_cache.find_similar_image(phash, _PHASH_MAX_DISTANCE)
+    if match is None:
+        return None
+    found = col.get(ids=[match[0]], include=["embeddings"])
+    embeddings = found.get("embeddings") if found else None
+    if embeddings is None or len(embeddings) == 0 or embeddings[0] is None:
+        return None
+    vec = embeddings[0]
+    return vec.tolist() if hasattr(vec, "tolist") else list(vec)
+
+
+def _embed_image_for_search(image_path: str) -> List[float]:
+    """為搜尋目的進行圖像 embedding。
+    
+    包含回退邏輯：主要方法失敗時回退到標題 + 文字 embedding。
+    相同內容（sha256）的圖像會直接取用磁碟快取，不重複呼叫 API。
+    """
+    return _embed_image_cached(image_path)
+
+
 # ---- 輕量級快取：減少重複嵌入開銷 ----
 
 @lru_cache(maxsize=2048)
@@ -487,7 +657,7 @@ def _cached_embed_text(q: str) -> List[float]:
 
 @lru_cache(maxsize=512)
 def _cached_embed_image_for_search(path: str) -> Tuple[float, ...]:
-    # 基於絕對路徑做快取（若檔案更新需重開進程或改為加上 mtime）
+    # 基於絕對路徑做快取（若檔案更新需重開進程或改為加上 mtime）；未命中時仍會先查內容雜湊的磁碟快取
     abs_path = str(Path(path).resolve())
     vec = _embed_image_for_search(abs_path)
     # lru_cache 需要可雜湊，轉 tuple
@@ -2,6 +2,8 @@ __all__ = [
     "fs",
     "metadata",
     "gemini_client",
+    "http_client",
+    "tokens",
 ]
 
 
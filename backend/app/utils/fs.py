@@ -1,9 +1,92 @@
 import os
+import secrets
+from functools import lru_cache
+from pathlib import Path
 from typing import Iterable
 
 
+# Directory mtimes can be as coarse as one second (ext3, HFS+, some network
+# mounts); an entry added or removed in the same tick as a scan leaves the
+# mtime unchanged, so a listing is only reused once its scan is this far past it.
+_MTIME_SETTLE_NS = 1_000_000_000
+
+
+def listing_is_settled(dir_mtime_ns: int, scanned_at_ns: int) -> bool:
+    """Whether a directory listing taken at scanned_at_ns can be reused while the mtime is unchanged."""
+    return scanned_at_ns - dir_mtime_ns >= _MTIME_SETTLE_NS
+
+
 def ensure_dirs(dirs: Iterable[str]) -> None:
     for d in dirs:
         os.makedirs(d, exist_ok=True)
 
 
+@lru_cache(maxsize=32)
+def resolved_dir(path: str) -> Path:
+    """Expand, resolve and create an output directory once per process.
+
+    Later calls for the same path are a cache hit with no syscalls, so a
+    writer whose directory is removed at runtime must recreate it itself.
+    """
+    directory = Path(path).expanduser().resolve()
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+# Random-suffix retries after the plain name is taken, before giving up.
+_UNIQUE_NAME_ATTEMPTS = 4
+
+
+def create_unique_file(directory: Path, base_name: str, ext: str) -> Path:
+    """Atomically create an empty ``{base_name}{ext}`` in directory and return its path.
+
+    The file is created with O_EXCL, so concurrent callers can never get the same
+    name. A taken name is retried with a random ``_xxxxxx`` suffix.
+    """
+    name = f"{base_name}{ext}"
+    for _ in range(_UNIQUE_NAME_ATTEMPTS + 1):
+        candidate = directory / name
+        try:
+            fd = os.open(candidate, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            name = f"{base_name}_{secrets.token_hex(3)}{ext}"
+            continue
+        except FileNotFoundError:
+            # Directory removed since it was created; recreate it and retry this name.
+            directory.mkdir(parents=True, exist_ok=True)
+            fd = os.open(candidate, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        os.close(fd)
+        return candidate
+    raise RuntimeError(f"無法建立不重複的輸出檔名：{base_name}{ext}")
+
+
+def write_file_bytes(path: str, data: bytes, *, fsync: bool = False) -> None:
+    """Write data with raw os.write calls (no buffered file object), optionally fsyncing."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+        if fsync:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def fsync_file(path: str) -> None:
+    """fsync a file that was written through another handle (e.g. by a library)."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def fsync_dir(path: str) -> None:
+    """fsync a directory so renames inside it survive a crash."""
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
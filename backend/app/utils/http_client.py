@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Tuple
+
+import httpx
+
+try:
+    import orjson
+except ImportError:  # Optional: stdlib json is used when orjson is not installed
+    orjson = None
+
+try:
+    import h2  # noqa: F401
+except ImportError:  # Optional: HTTP/2 is used when the h2 package is installed
+    h2 = None
+
+
+_client: httpx.Client | None = None
+_STREAM_CHUNK = 64 * 1024
+_OUTPUT_FILE_MODE = 0o644
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.Client:
+    """Shared client for outbound API calls (ElevenLabs, OpenAI).
+
+    Keeping one pool means consecutive requests to the same provider reuse the
+    open TLS connection instead of handshaking again. Callers pass their own
+    per-request timeout.
+    """
+    global _client
+    client = _client
+    if client is None:
+        # Called from threadpool workers; make sure only one pool is created.
+        with _client_lock:
+            if _client is None:
+                _client = httpx.Client(http2=h2 is not None)
+            client = _client
+    return client
+
+
+def close_http_client() -> None:
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        client.close()
+
+
+def encode_json_body(payload: Any) -> bytes:
+    """Encode a request body the way httpx's json= does (compact UTF-8), using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), allow_nan=False).encode("utf-8")
+
+
+def stream_post_to_file(
+    url: str,
+    directory: str,
+    *,
+    timeout: float,
+    fsync: bool = False,
+    **kwargs: Any,
+) -> Tuple[str, int, str]:
+    """POST with the shared client and stream the response body to a temp file.
+
+    Returns (temp path in directory, size in bytes, sha256 hex); the body is
+    hashed while it is written, never held in memory whole. Non-2xx responses
+    are read and raised as httpx.HTTPStatusError, like raise_for_status() after
+    a plain post, so callers can still inspect exc.response.text.
+    """
+    with get_http_client().stream("POST", url, timeout=timeout, **kwargs) as response:
+        if not response.is_success:
+            response.read()
+            response.raise_for_status()
+        hasher = hashlib.sha256()
+        size = 0
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+        except FileNotFoundError:
+            # Output directory removed at runtime; recreate it once.
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                # mkstemp creates 0600; the staged file becomes the served output, so
+                # give it the same 0644 mode write_file_bytes uses.
+                if hasattr(os, "fchmod"):
+                    os.fchmod(f.fileno(), _OUTPUT_FILE_MODE)
+                for chunk in response.iter_bytes(_STREAM_CHUNK):
+                    f.write(chunk)
+                    hasher.update(chunk)
+                    size += len(chunk)
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+    return temp_path, size, hasher.hexdigest()
@@ -5,6 +5,7 @@ from datetime import datetime, timezone
 from typing import Any, Dict, Union
 
 from ..config import settings
+from .fs import fsync_dir, write_file_bytes
 
 PathLike = Union[str, os.PathLike[str]]
 
@@ -17,6 +18,49 @@ def write_metadata(data: Dict[str, Any], base_name: str) -> str:
     return path
 
 
+def commit_output_with_metadata(
+    staged_path: PathLike,
+    output_path: PathLike,
+    metadata: Dict[str, Any],
+    base_name: str,
+    *,
+    fsync: bool = False,
+) -> str:
+    """Rename an already-written staged file to output_path together with its sidecar.
+
+    The sidecar is written to a temp name first and both are renamed into
+    place, output first, so the sidecar never points at a missing or partial
+    file. The staged file must be on the same filesystem as output_path and is
+    removed if the commit fails. With fsync, each touched directory is flushed
+    once after both renames.
+    """
+    os.makedirs(settings.metadata_dir, exist_ok=True)
+    staged_path = os.fspath(staged_path)
+    output_path = os.fspath(output_path)
+    metadata_path = os.path.join(settings.metadata_dir, f"{base_name}.json")
+    metadata_tmp = f"{metadata_path}.tmp"
+    try:
+        sidecar = json.dumps(metadata, ensure_ascii=False, indent=2).encode("utf-8")
+        write_file_bytes(metadata_tmp, sidecar, fsync=fsync)
+        os.replace(staged_path, output_path)
+        os.replace(metadata_tmp, metadata_path)
+    except BaseException:
+        _remove_quietly(staged_path)
+        _remove_quietly(metadata_tmp)
+        raise
+    if fsync:
+        for directory in {os.path.dirname(output_path), os.path.dirname(metadata_path)}:
+            fsync_dir(directory)
+    return metadata_path
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
 def utc_now_iso_z() -> str:
     """Return current UTC time in ISO format with Z suffix."""
     return datetime.now(tz=timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
@@ -24,6 +68,9 @@ def utc_now_iso_z() -> str:
 
 def compute_sha256(path: PathLike, chunk_size: int = 65536) -> str:
     """Compute sha256 checksum for the given file path."""
+    if hasattr(hashlib, "file_digest"):  # Python 3.11+: read and hash entirely in C
+        with open(path, "rb") as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()
     hasher = hashlib.sha256()
     with open(path, "rb") as f:
         for chunk in iter(lambda: f.read(chunk_size), b""):
@@ -0,0 +1,34 @@
+import os
+import threading
+
+_POOL_SIZE = 4096
+
+_pool = b""
+_offset = 0
+_lock = threading.Lock()
+
+
+def _reset_pool() -> None:
+    # A forked worker must not hand out the same bytes as its parent or siblings.
+    global _pool, _offset, _lock
+    _pool, _offset = b"", 0
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_pool)
+
+
+def token_hex4() -> str:
+    """8 hex chars of os.urandom output, like secrets.token_hex(4).
+
+    Bytes are drawn from one os.urandom(4096) call and handed out 4 at a time,
+    so bursts of filename tokens do not cost a syscall each.
+    """
+    global _pool, _offset
+    with _lock:
+        if _offset + 4 > len(_pool):
+            _pool, _offset = os.urandom(_POOL_SIZE), 0
+        start = _offset
+        _offset = start + 4
+        return _pool[start:start + 4].hex()
@@ -18,6 +18,7 @@ os.environ.setdefault("METADATA_DIR", str(_temp_path / "metadata"))
 os.environ.setdefault("SCREENSHOT_DIR", str(_temp_path / "screen_shots"))
 os.environ.setdefault("GENERATED_SOUNDS_DIR", str(_temp_path / "generated_sounds"))
 os.environ.setdefault("CHROMA_DB_PATH", str(_temp_path / "chroma_db"))
+os.environ.setdefault("CAMERA_PRESETS_FILE", str(_temp_path / "metadata" / "camera_presets.json"))
 
 # Create directories
 (_temp_path / "offspring_images").mkdir(parents=True)
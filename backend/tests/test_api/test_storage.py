@@ -317,3 +317,22 @@ def test_delete_camera_preset_invalid_name(client: TestClient):
     response = client.delete("/api/camera-presets/invalid/name")
     # Invalid name may return 400 or 404 depending on validation
     assert response.status_code in [400, 404]
+
+
+@pytest.mark.api
+def test_upload_screenshot_saves_file(client: TestClient, monkeypatch: pytest.MonkeyPatch, tmp_path: Path):
+    """Test uploading a screenshot writes it under the screenshot directory."""
+    from app.services import screenshots
+
+    monkeypatch.setattr(screenshots.settings, "screenshot_dir", str(tmp_path / "screenshots"))
+    response = client.post(
+        "/api/screenshots",
+        files={"file": ("scene.png", b"\x89PNG fake", "image/png")},
+    )
+
+    assert response.status_code == 201
+    data = response.json()
+    saved = Path(data["absolute_path"])
+    assert saved.parent == (tmp_path / "screenshots").resolve()
+    assert saved.read_bytes() == b"\x89PNG fake"
+    assert data["original_filename"] == "scene.png"
@@ -0,0 +1,153 @@
+"""Tests for the persistent (model, sha256) embedding cache."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from app.services import embedding_cache, vector_store
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedding_cache.settings, "chroma_db_path", str(tmp_path / "chroma"))
+    embedding_cache.close_cache()
+    yield
+    embedding_cache.close_cache()
+
+
+def test_round_trip_and_model_isolation() -> None:
+    assert embedding_cache.get_embedding("m1", "abc") is None
+
+    embedding_cache.put_embedding("m1", "abc", [0.5, -1.25, 2.0])
+
+    assert embedding_cache.get_embedding("m1", "abc") == [0.5, -1.25, 2.0]
+    assert embedding_cache.get_embedding("m2", "abc") is None
+    assert (Path(embedding_cache.settings.chroma_db_path) / embedding_cache.CACHE_FILENAME).exists()
+
+
+def test_cache_survives_reopen() -> None:
+    embedding_cache.put_embedding("m", "digest", [1.0, 2.0])
+    embedding_cache.close_cache()
+
+    assert embedding_cache.get_embedding("m", "digest") == [1.0, 2.0]
+
+
+def test_search_embedding_is_keyed_by_content(tmp_path, monkeypatch) -> None:
+    first = tmp_path / "first.png"
+    second = tmp_path / "copy_of_first.png"
+    first.write_bytes(b"same-bytes")
+    second.write_bytes(b"same-bytes")
+    calls = []
+
+    def fake_embed(path: str):
+        calls.append(path)
+        return [0.25, 0.75]
+
+    monkeypatch.setattr(vector_store, "embed_image", fake_embed)
+
+    assert vector_store._embed_image_for_search(str(first)) == [0.25, 0.75]
+    assert vector_store._embed_image_for_search(str(second)) == [0.25, 0.75]
+    assert calls == [str(first)]
+
+    second.write_bytes(b"edited")
+    vector_store._embed_image_for_search(str(second))
+    assert calls == [str(first), str(second)]
+
+
+def test_search_embedding_cache_misses_when_pipeline_changes(tmp_path, monkeypatch) -> None:
+    image = tmp_path / "shot.png"
+    image.write_bytes(b"bytes")
+    calls = []
+
+    def fake_embed(path: str):
+        calls.append(path)
+        return [float(len(calls))]
+
+    monkeypatch.setattr(vector_store, "embed_image", fake_embed)
+    monkeypatch.setattr(vector_store.settings, "openai_vision_model", "vision-a")
+
+    assert vector_store._embed_image_for_search(str(image)) == [1.0]
+    assert vector_store._embed_image_for_search(str(image)) == [1.0]
+
+    monkeypatch.setattr(vector_store.settings, "openai_vision_model", "vision-b")
+    assert vector_store._embed_image_for_search(str(image)) == [2.0]
+
+    monkeypatch.setattr(vector_store, "_EMBED_PIPELINE_VERSION", "v-test")
+    assert vector_store._embed_image_for_search(str(image)) == [3.0]
+    assert len(calls) == 3
+
+
+def test_image_hash_lookup_uses_hamming_distance() -> None:
+    high_bit = 1 << 63  # 超出 SQLite 有號範圍，需正確往返
+    embedding_cache.put_image_hash("a.png", high_bit | 0b1111)
+    embedding_cache.put_image_hash("b.png", 0)
+    embedding_cache.close_cache()
+
+    assert embedding_cache.find_similar_image(high_bit | 0b1111, 5) == ("a.png", 0)
+    assert embedding_cache.find_similar_image(high_bit | 0b0011, 5) == ("a.png", 2)
+    assert embedding_cache.find_similar_image(1 << 40, 5) == ("b.png", 1)
+    assert embedding_cache.find_similar_image((1 << 64) - 1, 5) is None
+
+
+def _gradient_image(path: Path, fmt: str) -> None:
+    from PIL import Image
+
+    img = Image.linear_gradient("L").resize((128, 128)).convert("RGB")
+    img.save(path, format=fmt)
+
+
+def test_search_reuses_vector_of_near_duplicate(tmp_path, monkeypatch) -> None:
+    offspring = tmp_path / "offspring"
+    offspring.mkdir()
+    _gradient_image(offspring / "indexed.png", "PNG")
+    query = tmp_path / "resaved.jpg"
+    _gradient_image(query, "JPEG")
+    monkeypatch.setattr(vector_store.settings, "offspring_dir", str(offspring))
+    vector_store._record_perceptual_hash("indexed.png", offspring / "indexed.png")
+
+    class FakeCollection:
+        def get(self, ids, include=None):
+            if ids == ["indexed.png"]:
+                return {"ids": ids, "embeddings": [[0.1, 0.9]]}
+            return {"ids": [], "embeddings": []}
+
+        def query(self, query_embeddings, n_results, where=None):
+            assert query_embeddings == [[0.1, 0.9]]
+            return {"ids": [["indexed.png"]], "distances": [[0.0]], "metadatas": [[{}]]}
+
+    def fail_embed(path: str):
+        raise AssertionError("near-duplicate should not be re-embedded")
+
+    monkeypatch.setattr(vector_store, "get_images_collection", lambda: FakeCollection())
+    monkeypatch.setattr(vector_store, "_cached_embed_image_for_search", fail_embed)
+
+    result = vector_store.search_images_by_image(str(query), top_k=1)
+
+    assert result["results"][0]["id"] == "indexed.png"
+
+
+def test_search_exact_cache_hit_skips_perceptual_lookup(tmp_path, monkeypatch) -> None:
+    query = tmp_path / "query.png"
+    _gradient_image(query, "PNG")
+    embedding_cache.put_embedding(
+        vector_store._embedding_cache_key(), vector_store.compute_sha256(query), [0.5, 0.5]
+    )
+
+    class FakeCollection:
+        def get(self, ids, include=None):
+            return {"ids": [], "embeddings": []}
+
+        def query(self, query_embeddings, n_results, where=None):
+            assert query_embeddings == [[0.5, 0.5]]
+            return {"ids": [[]], "distances": [[]], "metadatas": [[]]}
+
+    def fail(*args, **kwargs):
+        raise AssertionError("exact cache hit should not reach the fuzzy lookup or the API")
+
+    monkeypatch.setattr(vector_store, "get_images_collection", lambda: FakeCollection())
+    monkeypatch.setattr(vector_store, "_perceptual_hash", fail)
+    monkeypatch.setattr(vector_store, "_cached_embed_image_for_search", fail)
+
+    assert vector_store.search_images_by_image(str(query)) == {"results": []}
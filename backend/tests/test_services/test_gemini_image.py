@@ -1,4 +1,6 @@
+import base64
 import json
+import os
 from datetime import datetime
 from io import BytesIO
 from pathlib import Path
@@ -58,8 +60,9 @@ def test_prepare_inputs_returns_metadata(tmp_path):
     images, input_details = generator._prepare_inputs(parents)
 
     assert len(images) == len(parents)
-    assert input_details[0]["name"].startswith("parent_0")
-    assert "x" in input_details[0]["dimensions"]
+    assert len(input_details) == len(parents)
+    assert input_details.names[0].startswith("parent_0")
+    assert "x" in input_details.dims[0]
 
 
 def test_call_gemini_returns_image(tmp_path):
@@ -156,6 +159,9 @@ def test_build_metadata_contains_expected_fields(tmp_path):
 
     assert metadata["output_format"] == "png"
     assert metadata["output_size"] == {"width": 32, "height": 32}
+    assert metadata["parents"] == ["parent_0.png", "parent_1.png"]
+    assert metadata["input_details"][1]["path"] == parents[1]
+    assert set(metadata["input_details"][0]) == {"path", "name", "file_size", "dimensions"}
 
 
 def test_generate_mixed_offspring_v2_writes_outputs(monkeypatch, tmp_path):
@@ -231,3 +237,403 @@ def test_generate_and_store_image_invalid_output_format(tmp_path):
 
     assert "輸出影像存檔失敗" in str(exc.value)
     assert "inputs=(2 images)" in str(exc.value)
+
+
+def test_write_output_large_png_uses_fast_compression(monkeypatch, tmp_path):
+    generator = _make_generator(
+        client=SimpleNamespace(),
+        filename_builder=lambda fmt, ts: f"large.{fmt}",
+    )
+    monkeypatch.setattr(gemini_image.settings, "offspring_dir", str(tmp_path))
+    captured: dict = {}
+    original_save = Image.Image.save
+
+    def _spy_save(self, fp, format=None, **params):
+        captured.update(params)
+        return original_save(self, fp, format=format, **params)
+
+    monkeypatch.setattr(Image.Image, "save", _spy_save)
+    img = Image.new("RGB", (1200, 1000), (10, 20, 30))
+
+    output_path, fmt, width, height = generator._write_output(
+        img,
+        output_format="png",
+        input_details=gemini_image.InputDetails(),
+    )
+
+    assert captured.get("compress_level") == gemini_image._LARGE_PNG_COMPRESS_LEVEL
+    assert (width, height) == (1200, 1000)
+    with Image.open(output_path) as reopened:
+        assert reopened.size == (1200, 1000)
+
+
+def test_call_gemini_decodes_base64_string_payload(tmp_path):
+    parents = _create_parent_images(tmp_path)
+    encoded = base64.b64encode(_make_sample_image_bytes()).decode("ascii")
+    generator = _make_generator(client=_fake_response_with_bytes(encoded))
+    images, details = generator._prepare_inputs(parents)
+
+    result = generator._call_gemini("prompt", images, details)
+
+    assert result.size == (32, 32)
+
+
+def test_call_gemini_rejects_invalid_base64_payload(tmp_path):
+    parents = _create_parent_images(tmp_path)
+    generator = _make_generator(client=_fake_response_with_bytes("not base64!"))
+    images, details = generator._prepare_inputs(parents)
+
+    with pytest.raises(RuntimeError) as exc:
+        generator._call_gemini("prompt", images, details)
+
+    assert "Gemini 影像資料無法解碼" in str(exc.value)
+
+
+def test_generate_passes_through_matching_png_bytes(monkeypatch, tmp_path):
+    parents = _create_parent_images(tmp_path)
+    image_bytes = _make_sample_image_bytes()
+    generator = _make_generator(
+        client=_fake_response_with_bytes(image_bytes),
+        filename_builder=lambda fmt, ts: f"passthrough.{fmt}",
+    )
+    monkeypatch.setattr(gemini_image.settings, "offspring_dir", str(tmp_path))
+    monkeypatch.setattr(gemini_image.settings, "metadata_dir", str(tmp_path / "meta"))
+
+    def _fail_resize(*args, **kwargs):
+        raise AssertionError("resize should be skipped for passthrough output")
+
+    monkeypatch.setattr(generator, "_resize_image", _fail_resize)
+
+    result = generator.generate(parent_paths=parents, prompt="prompt", output_format="png")
+
+    assert Path(result["output_image_path"]).read_bytes() == image_bytes
+    assert (result["width"], result["height"]) == (32, 32)
+
+
+def test_call_gemini_reports_truncated_image_payload(tmp_path):
+    parents = _create_parent_images(tmp_path)
+    truncated = _make_sample_image_bytes()[:60]
+    generator = _make_generator(client=_fake_response_with_bytes(truncated))
+    images, details = generator._prepare_inputs(parents)
+
+    with pytest.raises(RuntimeError) as exc:
+        generator._call_gemini("prompt", images, details)
+
+    assert "無法解析生成影像" in str(exc.value)
+
+
+@pytest.mark.parametrize(
+    ("size", "expected"),
+    [(0, "0B"), (1023, "1023B"), (1024, "1.00KB"), (3 * 1024 * 1024 // 2, "1.50MB"), (5 << 30, "5.00GB")],
+)
+def test_safe_size_formats_units(monkeypatch, size, expected):
+    monkeypatch.setattr(gemini_image.os.path, "getsize", lambda _path: size)
+
+    assert gemini_image._safe_size("ignored") == expected
+
+
+def test_resize_image_fit_mode_pads_transparent_png(tmp_path):
+    img = Image.new("RGBA", (300, 100), (255, 0, 0, 255))
+    generator = _make_generator(client=SimpleNamespace())
+
+    resized = generator._resize_image(
+        img,
+        output_format="png",
+        output_width=120,
+        output_height=120,
+        output_max_side=None,
+        resize_mode="fit",
+    )
+
+    assert resized.size == (120, 120)
+    assert resized.mode == "RGBA"
+    assert resized.getpixel((0, 0)) == (0, 0, 0, 0)
+    assert resized.getpixel((60, 60)) == (255, 0, 0, 255)
+
+
+def test_pick_images_from_genes_pool_only_returns_image_files(monkeypatch, tmp_path):
+    pool = tmp_path / "pool"
+    pool.mkdir()
+    for name in ("a.png", "b.JPG", "c.jpeg", "notes.txt"):
+        (pool / name).write_bytes(b"x")
+    (pool / "folder.png").mkdir()
+    monkeypatch.setattr(gemini_image.settings, "genes_pool_dirs", [str(pool)], raising=False)
+
+    picked = gemini_image._pick_images_from_genes_pool(3)
+
+    assert sorted(Path(p).name for p in picked) == ["a.png", "b.JPG", "c.jpeg"]
+
+
+def test_resolve_parent_paths_falls_back_to_basename(monkeypatch, tmp_path):
+    pool = tmp_path / "pool"
+    pool.mkdir()
+    (pool / "parent.png").write_bytes(b"x")
+    monkeypatch.setattr(gemini_image.settings, "genes_pool_dirs", [str(pool)], raising=False)
+    monkeypatch.setattr(gemini_image.settings, "offspring_dir", str(tmp_path / "offspring"))
+
+    resolved = gemini_image._resolve_parent_paths(["some/where/parent.png"])
+
+    assert resolved == [str(pool / "parent.png")]
+    with pytest.raises(ValueError):
+        gemini_image._resolve_parent_paths(["missing.png"])
+
+
+def test_pool_listing_is_cached_until_directory_changes(monkeypatch, tmp_path):
+    pool = tmp_path / "pool"
+    pool.mkdir()
+    (pool / "a.png").write_bytes(b"x")
+    (pool / "b.png").write_bytes(b"x")
+    monkeypatch.setattr(gemini_image, "_pool_cache", {})
+    monkeypatch.setattr(gemini_image.settings, "genes_pool_dirs", [str(pool)], raising=False)
+    # 目錄 mtime 需早於掃描時間超過時間解析度，快取才會被沿用
+    old_ns = pool.stat().st_mtime_ns - 10_000_000_000
+    os.utime(pool, ns=(old_ns, old_ns))
+
+    first = gemini_image._list_pool_dir(str(pool))
+    scans: list[str] = []
+    original_scandir = gemini_image.os.scandir
+
+    def _counting_scandir(path):
+        scans.append(path)
+        return original_scandir(path)
+
+    monkeypatch.setattr(gemini_image.os, "scandir", _counting_scandir)
+    assert gemini_image._list_pool_dir(str(pool)) is first
+    assert scans == []
+
+    (pool / "c.png").write_bytes(b"x")
+    st = pool.stat()
+    os.utime(pool, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    assert len(gemini_image._list_pool_dir(str(pool))) == 3
+    assert scans == [str(pool)]
+
+
+def test_pool_listing_rescans_when_scanned_in_same_mtime_tick(monkeypatch, tmp_path):
+    pool = tmp_path / "pool"
+    pool.mkdir()
+    (pool / "a.png").write_bytes(b"x")
+    monkeypatch.setattr(gemini_image, "_pool_cache", {})
+    st = pool.stat()
+
+    assert len(gemini_image._list_pool_dir(str(pool))) == 1
+    (pool / "gone.png").write_bytes(b"x")
+    (pool / "a.png").unlink()
+    # 模擬時間解析度粗糙：目錄內容變了但 mtime 沒變
+    os.utime(pool, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    assert [os.path.basename(p) for p in gemini_image._list_pool_dir(str(pool))] == ["gone.png"]
+
+
+def test_sampled_parent_deleted_before_open_is_resampled(monkeypatch, tmp_path):
+    pool = tmp_path / "pool"
+    pool.mkdir()
+    for name in ("a.png", "b.png", "c.png"):
+        Image.new("RGB", (8, 8), (10, 20, 30)).save(pool / name)
+    monkeypatch.setattr(gemini_image, "_pool_cache", {})
+    monkeypatch.setattr(gemini_image.settings, "genes_pool_dirs", [str(pool)], raising=False)
+    monkeypatch.setattr(gemini_image.settings, "offspring_dir", str(tmp_path / "out"))
+    monkeypatch.setattr(gemini_image.settings, "metadata_dir", str(tmp_path / "meta"))
+    generator = _make_generator(client=_fake_response_with_bytes(_make_sample_image_bytes()))
+    original_generate = gemini_image._generate_and_store_image
+    picks = []
+
+    def _stale_first_pick(count):
+        if not picks:
+            # 第一次取樣回傳已被刪除的父圖（等同快取清單落後）
+            (pool / "c.png").unlink()
+            picks.append("stale")
+            return [str(pool / "a.png"), str(pool / "c.png")]
+        picks.append("fresh")
+        return [str(pool / "a.png"), str(pool / "b.png")]
+
+    monkeypatch.setattr(gemini_image, "_pick_images_from_genes_pool", _stale_first_pick)
+    monkeypatch.setattr(
+        gemini_image,
+        "_generate_and_store_image",
+        lambda **kwargs: original_generate(generator=generator, **kwargs),
+    )
+
+    result = gemini_image.generate_mixed_offspring_v2(count=2, prompt="p")
+
+    assert picks == ["stale", "fresh"]
+    assert result["parents"] == ["a.png", "b.png"]
+
+
+def test_open_prepared_image_shrinks_large_jpeg(monkeypatch, tmp_path):
+    path = tmp_path / "large.jpg"
+    Image.new("RGB", (2400, 1200), (0, 128, 255)).save(path, format="JPEG")
+    monkeypatch.setattr(gemini_image.settings, "image_size", 512)
+
+    img = gemini_image._open_prepared_image(str(path))
+
+    assert img.size == (512, 256)
+    assert img.mode == "RGB"
+
+
+def test_resize_image_large_downscale_keeps_requested_size():
+    img = Image.new("RGB", (2000, 1000), (0, 0, 255))
+    generator = _make_generator(client=SimpleNamespace())
+
+    resized = generator._resize_image(
+        img,
+        output_format="png",
+        output_width=None,
+        output_height=None,
+        output_max_side=200,
+        resize_mode=None,
+    )
+
+    assert resized.size == (200, 100)
+    assert resized.getpixel((100, 50)) == (0, 0, 255)
+
+
+@pytest.mark.parametrize(
+    ("kwargs", "expected_size"),
+    [
+        ({"output_width": 16, "output_height": 8}, (16, 8)),
+        ({"output_width": 20, "output_height": 10, "resize_mode": "fit"}, (20, 10)),
+        ({"output_width": 16}, (16, 16)),
+        ({"output_max_side": 8}, (8, 8)),
+    ],
+)
+def test_generate_resizes_with_vips_backend(monkeypatch, tmp_path, kwargs, expected_size):
+    pytest.importorskip("pyvips")
+    parents = _create_parent_images(tmp_path)
+    generator = _make_generator(client=_fake_response_with_bytes(_make_sample_image_bytes()))
+    monkeypatch.setattr(gemini_image.settings, "offspring_dir", str(tmp_path))
+    monkeypatch.setattr(gemini_image.settings, "metadata_dir", str(tmp_path / "meta"))
+
+    def _fail_resize(*args, **kwargs):
+        raise AssertionError("Pillow resize should not run when pyvips is available")
+
+    monkeypatch.setattr(generator, "_resize_image", _fail_resize)
+
+    result = generator.generate(parent_paths=parents, prompt="prompt", output_format="png", **kwargs)
+
+    assert (result["width"], result["height"]) == expected_size
+    with Image.open(result["output_image_path"]) as written:
+        assert written.size == expected_size
+
+
+def test_generate_falls_back_to_pillow_without_vips(monkeypatch, tmp_path):
+    parents = _create_parent_images(tmp_path)
+    generator = _make_generator(client=_fake_response_with_bytes(_make_sample_image_bytes()))
+    monkeypatch.setattr(gemini_image, "pyvips", None)
+    monkeypatch.setattr(gemini_image.settings, "offspring_dir", str(tmp_path))
+    monkeypatch.setattr(gemini_image.settings, "metadata_dir", str(tmp_path / "meta"))
+
+    result = generator.generate(
+        parent_paths=parents,
+        prompt="prompt",
+        output_format="jpeg",
+        output_width=16,
+        output_height=8,
+    )
+
+    assert (result["width"], result["height"]) == (16, 8)
+    assert result["output_format"] == "jpeg"
+
+
+def test_generate_falls_back_to_pillow_when_vips_raises(monkeypatch, tmp_path, caplog):
+    parents = _create_parent_images(tmp_path)
+    generator = _make_generator(client=_fake_response_with_bytes(_make_sample_image_bytes()))
+
+    def _broken_thumbnail(*args, **kwargs):
+        raise OSError("libvips binding failure")
+
+    fake_vips = SimpleNamespace(Image=SimpleNamespace(thumbnail_buffer=_broken_thumbnail))
+    monkeypatch.setattr(gemini_image, "pyvips", fake_vips)
+    monkeypatch.setattr(gemini_image.settings, "offspring_dir", str(tmp_path))
+    monkeypatch.setattr(gemini_image.settings, "metadata_dir", str(tmp_path / "meta"))
+
+    with caplog.at_level("WARNING", logger=gemini_image.__name__):
+        result = generator.generate(
+            parent_paths=parents,
+            prompt="prompt",
+            output_format="png",
+            output_width=16,
+            output_height=8,
+        )
+
+    assert (result["width"], result["height"]) == (16, 8)
+    assert "Pillow" in caplog.text
+
+
+def test_generate_fsyncs_pillow_output_when_enabled(monkeypatch, tmp_path):
+    parents = _create_parent_images(tmp_path)
+    generator = _make_generator(client=_fake_response_with_bytes(_make_sample_image_bytes()))
+    out_dir = tmp_path / "out"
+    monkeypatch.setattr(gemini_image.settings, "offspring_dir", str(out_dir))
+    monkeypatch.setattr(gemini_image.settings, "metadata_dir", str(tmp_path / "meta"))
+    monkeypatch.setattr(gemini_image.settings, "fsync_outputs", True)
+    synced = []
+    real_fsync = os.fsync
+
+    def _recording_fsync(fd):
+        synced.append(os.path.realpath(f"/proc/self/fd/{fd}") if os.path.exists("/proc/self/fd") else fd)
+        real_fsync(fd)
+
+    # gemini_image 與 utils.fs 共用同一個 os 模組
+    monkeypatch.setattr(gemini_image.os, "fsync", _recording_fsync)
+
+    # PNG 回應轉為 JPEG 會走 Pillow 編碼路徑
+    result = generator.generate(parent_paths=parents, prompt="prompt", output_format="jpeg")
+
+    assert len(synced) == 2
+    if os.path.exists("/proc/self/fd"):
+        assert synced == [os.path.realpath(result["output_image_path"]), os.path.realpath(out_dir)]
+
+
+def test_default_filename_builder_uses_single_timestamp():
+    name = gemini_image._default_filename_builder("png", datetime(2024, 1, 2, 3, 4, 5, 678900))
+
+    assert name == "offspring_20240102_030405_678.png"
+
+
+def test_resolve_parent_paths_rejects_unsupported_format_before_lookup(monkeypatch, tmp_path):
+    monkeypatch.setattr(gemini_image.settings, "genes_pool_dirs", [str(tmp_path)], raising=False)
+
+    def _fail_isfile(path):
+        raise AssertionError("filesystem should not be probed")
+
+    monkeypatch.setattr(gemini_image.os.path, "isfile", _fail_isfile)
+
+    with pytest.raises(ValueError) as exc:
+        gemini_image._resolve_parent_paths(["notes.txt"])
+
+    assert "父圖格式不支援" in str(exc.value)
+
+
+def test_open_prepared_image_applies_exif_orientation(tmp_path):
+    path = tmp_path / "rotated.jpg"
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotate 90° clockwise on display
+    Image.new("RGB", (40, 20), (0, 0, 0)).save(path, format="JPEG", exif=exif)
+
+    img = gemini_image._open_prepared_image(str(path))
+
+    assert img.size == (20, 40)
+
+
+def test_open_prepared_image_skips_transpose_without_orientation(monkeypatch, tmp_path):
+    path = tmp_path / "plain.png"
+    Image.new("RGB", (40, 20), (0, 0, 0)).save(path)
+
+    def _fail_transpose(image):
+        raise AssertionError("exif_transpose should be skipped")
+
+    monkeypatch.setattr(gemini_image.ImageOps, "exif_transpose", _fail_transpose)
+
+    assert gemini_image._open_prepared_image(str(path)).size == (40, 20)
+
+
+def test_open_prepared_image_releases_file_handle(monkeypatch, tmp_path):
+    path = tmp_path / "small.png"
+    Image.new("RGB", (300, 300), (1, 2, 3)).save(path)
+    monkeypatch.setattr(gemini_image.settings, "image_size", 512)
+
+    img = gemini_image._open_prepared_image(str(path))
+
+    assert getattr(img, "fp", None) is None
+    assert img.getpixel((0, 0)) == (1, 2, 3)
@@ -0,0 +1,282 @@
+"""Tests for iframe_config service helpers."""
+
+import os
+
+import pytest
+
+from app.models.iframe import IframeConfig, PanelConfig
+from app.services import iframe_config
+
+
+def test_resolve_iframe_config_encodes_panel_src():
+    config = IframeConfig(
+        panels=[
+            PanelConfig(id="a", image="img one.png", params={"slide_mode": "true", "label": "a&b"}),
+            PanelConfig(id="b", url="https://example.com/embed"),
+        ],
+    )
+
+    resolved = iframe_config.resolve_iframe_config(config)
+
+    assert resolved.panels[0].src == "/?img=img+one.png&slide_mode=true&label=a%26b"
+    assert resolved.panels[1].src == "https://example.com/embed"
+
+
+def test_resolve_iframe_config_reuses_built_src():
+    iframe_config._build_src.cache_clear()
+    config = IframeConfig(panels=[PanelConfig(id="a", image="x.png", params={"k": "v"})])
+
+    iframe_config.resolve_iframe_config(config)
+    iframe_config.resolve_iframe_config(config)
+
+    info = iframe_config._build_src.cache_info()
+    assert info.misses == 1
+    assert info.hits == 1
+
+
+def test_load_iframe_config_caches_until_file_changes(monkeypatch, tmp_path):
+    monkeypatch.setattr(iframe_config, "_BASE_DIR", tmp_path)
+    monkeypatch.setattr(iframe_config, "_GLOBAL_CONFIG_PATH", tmp_path / "iframe_config.json")
+    monkeypatch.setattr(iframe_config, "_config_cache", {})
+    path = tmp_path / "iframe_config__cached.json"
+    path.write_text('{"layout": "grid", "gap": 3, "panels": [{"url": "/a"}]}', encoding="utf-8")
+
+    first = iframe_config.load_iframe_config("cached")
+    assert iframe_config.load_iframe_config("cached") is first
+
+    path.write_text('{"layout": "grid", "gap": 7, "panels": [{"url": "/a"}]}', encoding="utf-8")
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    assert iframe_config.load_iframe_config("cached").gap == 7
+
+
+def test_save_iframe_config_refreshes_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(iframe_config, "_BASE_DIR", tmp_path)
+    monkeypatch.setattr(iframe_config, "_config_cache", {})
+    iframe_config.save_iframe_config(
+        {"target_client_id": "saver", "gap": 1, "panels": [{"url": "/a"}]}
+    )
+    assert iframe_config.load_iframe_config("saver").gap == 1
+
+    saved, _ = iframe_config.save_iframe_config(
+        {"target_client_id": "saver", "gap": 2, "panels": [{"url": "/a"}]}
+    )
+
+    assert iframe_config.load_iframe_config("saver") is saved
+
+
+def test_config_helpers_round_trip_unicode(tmp_path):
+    path = tmp_path / "config.json"
+    config = IframeConfig(panels=[PanelConfig(url="/a", label="畫面")])
+
+    iframe_config._write_config(path, config)
+
+    assert "畫面" in path.read_text(encoding="utf-8")
+    assert iframe_config._read_config(path) == config
+
+
+def test_validate_images_tracks_offspring_directory(monkeypatch, tmp_path):
+    monkeypatch.setattr(iframe_config.settings, "offspring_dir", str(tmp_path))
+    monkeypatch.setattr(iframe_config, "_offspring_cache", None)
+    config = IframeConfig(panels=[PanelConfig(image="later.png")])
+
+    with pytest.raises(ValueError):
+        iframe_config._validate_images(config)
+
+    (tmp_path / "later.png").write_bytes(b"x")
+    st = tmp_path.stat()
+    os.utime(tmp_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    iframe_config._validate_images(config)
+
+
+def test_validate_images_accepts_file_created_within_same_mtime_tick(monkeypatch, tmp_path):
+    monkeypatch.setattr(iframe_config.settings, "offspring_dir", str(tmp_path))
+    monkeypatch.setattr(iframe_config, "_offspring_cache", None)
+    st = tmp_path.stat()
+    assert iframe_config._offspring_filenames() == frozenset()
+
+    (tmp_path / "fresh.png").write_bytes(b"x")
+    # 模擬目錄 mtime 未前進（時間解析度較粗的檔案系統）
+    os.utime(tmp_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    iframe_config._validate_images(IframeConfig(panels=[PanelConfig(image="fresh.png")]))
+    with pytest.raises(ValueError):
+        iframe_config._validate_images(IframeConfig(panels=[PanelConfig(image="absent.png")]))
+
+
+def test_saved_config_does_not_persist_derived_src(monkeypatch, tmp_path):
+    monkeypatch.setattr(iframe_config, "_BASE_DIR", tmp_path)
+    monkeypatch.setattr(iframe_config, "_config_cache", {})
+
+    iframe_config.save_iframe_config({"target_client_id": "derived", "panels": [{"url": "/?mode=a"}]})
+
+    assert "resolved_src" not in (tmp_path / "iframe_config__derived.json").read_text(encoding="utf-8")
+
+
+def test_resolve_iframe_config_ignores_stale_stored_src(tmp_path):
+    # 舊版設定檔可能留有 resolved_src；src 一律由目前的 image/url/params 重新計算
+    path = tmp_path / "legacy.json"
+    path.write_text('{"panels": [{"url": "/live", "resolved_src": "/stale"}]}', encoding="utf-8")
+    config = iframe_config._read_config(path)
+
+    resolved = iframe_config.resolve_iframe_config(config)
+
+    assert resolved.panels[0].src == "/live"
+    assert "resolved_src" not in config.model_dump()["panels"][0]
+
+
+def test_fast_quote_matches_quote_plus():
+    from urllib.parse import quote_plus
+
+    for value in ("offspring_20250929_114732_835.png", "a b.png", "名字.png", "x~y-z", ""):
+        assert iframe_config._fast_quote(value) == quote_plus(value)
+
+
+def test_write_config_replaces_atomically(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text("old", encoding="utf-8")
+
+    iframe_config._write_config(path, IframeConfig(gap=4))
+
+    assert iframe_config._read_config(path).gap == 4
+    assert list(tmp_path.glob("*.tmp")) == []
+    assert (path.stat().st_mode & 0o777) == 0o644
+
+
+def test_write_config_concurrent_writers_use_separate_temp_files(tmp_path):
+    import threading
+
+    path = tmp_path / "config.json"
+    start = threading.Barrier(8)
+    errors = []
+
+    def writer(gap):
+        start.wait()
+        try:
+            for _ in range(20):
+                iframe_config._write_config(path, IframeConfig(gap=gap))
+        except Exception as exc:  # noqa: BLE001
+            errors.append(exc)
+
+    threads = [threading.Thread(target=writer, args=(gap,)) for gap in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert errors == []
+    assert iframe_config._read_config(path).gap in range(8)
+    assert list(tmp_path.glob("*.tmp")) == []
+
+
+def test_list_snapshots_sorts_newest_first_and_skips_non_json(monkeypatch, tmp_path):
+    monkeypatch.setattr(iframe_config, "_SNAPSHOT_BASE_DIR", tmp_path)
+    directory = tmp_path / "lister"
+    directory.mkdir()
+    for offset, name in enumerate(("older", "newer")):
+        path = directory / f"{name}.json"
+        path.write_text("{}", encoding="utf-8")
+        os.utime(path, ns=(0, (offset + 1) * 1_000_000_000))
+    (directory / "partial.json.tmp").write_text("{", encoding="utf-8")
+    (directory / "nested.json").mkdir()
+
+    client_id, records = iframe_config.list_iframe_config_snapshots("lister")
+
+    assert client_id == "lister"
+    assert [record["name"] for record in records] == ["newer", "older"]
+    assert iframe_config.list_iframe_config_snapshots("missing") == ("missing", [])
+
+
+def test_sanitizers_cache_validation_but_still_raise():
+    iframe_config._check_identifier.cache_clear()
+
+    assert iframe_config._sanitize_client_id(" kiosk-1 ") == "kiosk-1"
+    assert iframe_config._sanitize_client_id("  ") is None
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            iframe_config._sanitize_client_id("bad id")
+        with pytest.raises(ValueError):
+            iframe_config._sanitize_snapshot_name("bad/name")
+    with pytest.raises(ValueError):
+        iframe_config._sanitize_snapshot_name(" ")
+
+    assert iframe_config._check_identifier.cache_info().hits >= 2
+
+
+def test_snapshot_round_trip_sanitizes_client_id_once(monkeypatch, tmp_path):
+    monkeypatch.setattr(iframe_config, "_BASE_DIR", tmp_path)
+    monkeypatch.setattr(iframe_config, "_SNAPSHOT_BASE_DIR", tmp_path / "snapshots")
+    monkeypatch.setattr(iframe_config, "_config_cache", {})
+    iframe_config.save_iframe_config({"target_client_id": "once", "panels": [{"url": "/a"}]})
+
+    calls = []
+    original = iframe_config._sanitize_client_id
+
+    def counting(value):
+        calls.append(value)
+        return original(value)
+
+    monkeypatch.setattr(iframe_config, "_sanitize_client_id", counting)
+
+    snapshot = iframe_config.save_iframe_config_snapshot("once", "keep")
+    assert calls == ["once"]
+
+    calls.clear()
+    restored, client_id = iframe_config.restore_iframe_config_snapshot("once", snapshot["name"])
+    assert calls == ["once"]
+    assert client_id == "once"
+    assert restored.panels[0].url == "/a"
+
+
+def test_build_src_matches_urlencode_with_quote_plus():
+    from urllib.parse import quote_plus, urlencode
+
+    iframe_config._build_src.cache_clear()
+    params = (("mode", "a b"), ("名", "值"), ("plain", "ok"))
+
+    src = iframe_config._build_src("x y.png", None, params)
+
+    assert src == "/?" + urlencode((("img", "x y.png"), *params), quote_via=quote_plus)
+
+
+def test_config_payload_uses_cached_mtime_without_stat(monkeypatch, tmp_path):
+    monkeypatch.setattr(iframe_config, "_BASE_DIR", tmp_path)
+    monkeypatch.setattr(iframe_config, "_config_cache", {})
+    config, client_id = iframe_config.save_iframe_config(
+        {"target_client_id": "stamp", "panels": [{"url": "/a"}]}
+    )
+    expected = iframe_config.isoformat((tmp_path / "iframe_config__stamp.json").stat().st_mtime)
+
+    def fail_stat(*args, **kwargs):
+        raise AssertionError("resolve_iframe_config should reuse the cached mtime")
+
+    monkeypatch.setattr(iframe_config.Path, "stat", fail_stat)
+    payload = iframe_config.config_payload_for_response(config, client_id)
+
+    assert payload["updated_at"] == expected
+
+
+def test_resolve_iframe_config_accepts_explicit_updated_at():
+    config = IframeConfig(panels=[PanelConfig(url="/a")])
+
+    resolved = iframe_config.resolve_iframe_config(config, updated_at=0.0)
+
+    assert resolved.updated_at == "1970-01-01T00:00:00Z"
+
+
+def test_write_config_creates_directory_once_and_recovers_if_removed(monkeypatch, tmp_path):
+    import shutil
+
+    monkeypatch.setattr(iframe_config, "_ensured_dirs", set())
+    directory = tmp_path / "nested"
+    path = directory / "config.json"
+
+    iframe_config._write_config(path, IframeConfig(gap=1))
+    assert directory in iframe_config._ensured_dirs
+
+    shutil.rmtree(directory)
+    iframe_config._write_config(path, IframeConfig(gap=2))
+
+    assert iframe_config._read_config(path).gap == 2
@@ -0,0 +1,41 @@
+"""Tests for screenshot analysis helpers."""
+
+from PIL import Image, JpegImagePlugin
+
+from app.services import image_analysis
+
+
+def test_load_image_drafts_large_jpeg_before_resizing(monkeypatch, tmp_path):
+    monkeypatch.setattr(image_analysis.settings, "image_size", 512)
+    path = tmp_path / "shot.jpg"
+    Image.new("RGB", (2400, 1200), (10, 20, 30)).save(path, format="JPEG")
+
+    drafts = []
+    original_draft = JpegImagePlugin.JpegImageFile.draft
+
+    def recording_draft(self, mode, size):
+        drafts.append((mode, size))
+        return original_draft(self, mode, size)
+
+    monkeypatch.setattr(JpegImagePlugin.JpegImageFile, "draft", recording_draft)
+
+    img = image_analysis._load_image(str(path))
+
+    assert drafts[0] == ("RGB", (512, 512))
+    assert img.size == (512, 256)
+    assert img.mode == "RGB"
+
+
+def test_inline_image_part_passes_small_files_through(monkeypatch, tmp_path):
+    monkeypatch.setattr(image_analysis.settings, "image_size", 512)
+    small = tmp_path / "small.png"
+    Image.new("RGB", (300, 200), (1, 2, 3)).save(small, format="PNG")
+    large = tmp_path / "large.png"
+    Image.new("RGB", (1300, 200), (1, 2, 3)).save(large, format="PNG")
+
+    part = image_analysis._inline_image_part(str(small))
+
+    assert part is not None
+    assert part.inline_data.mime_type == "image/png"
+    assert part.inline_data.data == small.read_bytes()
+    assert image_analysis._inline_image_part(str(large)) is None
@@ -44,11 +44,11 @@ def test_kinship_index_query_functions():
     
     # Test parents_of
     parents = kinship_index.parents_of(test_img)
-    assert isinstance(parents, list)
+    assert isinstance(parents, tuple)
     
     # Test children_of
     children = kinship_index.children_of(test_img)
-    assert isinstance(children, list)
+    assert isinstance(children, tuple)
     
     # Test siblings_of
     siblings = kinship_index.siblings_of(test_img)
@@ -130,3 +130,93 @@ def test_kinship_index_stats():
     assert stats['offspring_count'] >= 0
     assert stats['parent_count'] >= 0
 
+
+
+def _write_offspring_metadata(directory, child, parents):
+    import json
+
+    (directory / f"{child.rsplit('.', 1)[0]}.json").write_text(
+        json.dumps({"output_image": child, "parents": parents}),
+        encoding="utf-8",
+    )
+
+
+@pytest.fixture
+def isolated_index(monkeypatch, tmp_path):
+    from app.services import kinship_index as kinship_module
+
+    monkeypatch.setattr(kinship_module.settings, "metadata_dir", str(tmp_path))
+    return kinship_module.KinshipIndex()
+
+
+def test_kinship_index_round_trip_with_stdlib_fallback(monkeypatch, tmp_path, isolated_index):
+    from app.services import kinship_index as kinship_module
+
+    monkeypatch.setattr(kinship_module, "orjson", None)
+    _write_offspring_metadata(tmp_path, "offspring_a.png", ["p1.png", "子.png"])
+
+    isolated_index.build_and_save()
+    reloaded = kinship_module.KinshipIndex()
+
+    assert reloaded.load() is True
+    assert list(reloaded.parents_of("offspring_a.png")) == ["p1.png", "子.png"]
+    assert list(reloaded.children_of("子.png")) == ["offspring_a.png"]
+
+
+def test_build_and_save_scans_only_offspring_metadata(tmp_path, isolated_index):
+    _write_offspring_metadata(tmp_path, "offspring_b.png", ["p1.png", "p2.png"])
+    _write_offspring_metadata(tmp_path, "offspring_c.png", ["p2.png"])
+    (tmp_path / "offspring_broken.json").write_text("{", encoding="utf-8")
+    (tmp_path / "other.json").write_text('{"output_image": "x.png", "parents": ["p9.png"]}', encoding="utf-8")
+
+    result = isolated_index.build_and_save()
+
+    assert result["metadata_count"] == 2
+    assert list(isolated_index.children_of("p2.png")) == ["offspring_b.png", "offspring_c.png"]
+    assert not isolated_index.has_offspring("x.png")
+
+
+def test_build_and_save_dedups_repeated_parents(tmp_path, isolated_index):
+    _write_offspring_metadata(tmp_path, "offspring_d.png", ["p3.png", "dir/p1.png", "p1.png"])
+
+    isolated_index.build_and_save()
+
+    assert list(isolated_index.parents_of("offspring_d.png")) == ["p1.png", "p3.png"]
+    assert list(isolated_index.children_of("p1.png")) == ["offspring_d.png"]
+
+
+def test_kinship_queries_return_shared_interned_tuples(tmp_path, isolated_index):
+    _write_offspring_metadata(tmp_path, "offspring_e.png", ["p1.png"])
+    _write_offspring_metadata(tmp_path, "offspring_f.png", ["p1.png"])
+    isolated_index.build_and_save()
+
+    assert isolated_index.parents_of("offspring_e.png") is isolated_index.parents_of("offspring_e.png")
+    assert isolated_index.parents_of("missing.png") == ()
+    assert isolated_index.parents_of("offspring_e.png")[0] is isolated_index.parents_of("offspring_f.png")[0]
+    assert isolated_index.siblings_of("offspring_e.png") == ["offspring_f.png"]
+
+
+def test_ancestors_levels_of_walks_each_ancestor_once(tmp_path, isolated_index):
+    _write_offspring_metadata(tmp_path, "offspring_g.png", ["offspring_m.png", "offspring_n.png"])
+    _write_offspring_metadata(tmp_path, "offspring_m.png", ["offspring_root.png"])
+    _write_offspring_metadata(tmp_path, "offspring_n.png", ["offspring_root.png", "offspring_m.png"])
+    _write_offspring_metadata(tmp_path, "offspring_root.png", ["offspring_g.png"])
+    isolated_index.build_and_save()
+
+    assert isolated_index.ancestors_levels_of("offspring_g.png", -1) == [["offspring_m.png", "offspring_n.png"], ["offspring_root.png"]]
+    assert isolated_index.ancestors_levels_of("offspring_g.png", 1) == [["offspring_m.png", "offspring_n.png"]]
+    assert isolated_index.ancestors_levels_of("offspring_g.png", 0) == []
+
+
+def test_load_reads_only_the_json_index(tmp_path, isolated_index):
+    from app.services import kinship_index as kinship_module
+
+    _write_offspring_metadata(tmp_path, "offspring_h.png", ["p1.png"])
+    isolated_index.build_and_save()
+    assert sorted(p.name for p in tmp_path.glob("kinship_index*")) == [kinship_module.INDEX_FILENAME]
+
+    # 中繼資料目錄可寫入，任何放在旁邊的二進位檔都不可被載入
+    (tmp_path / "kinship_index.pkl").write_bytes(b"not a pickle")
+    reloaded = kinship_module.KinshipIndex()
+    assert reloaded.load() is True
+    assert reloaded.parents_of("offspring_h.png") == ("p1.png",)
@@ -1,3 +1,6 @@
+import asyncio
+import json
+
 import pytest
 
 from app.services.realtime_bus import RealtimeBroadcaster
@@ -17,6 +20,9 @@ class DummyWebSocket:
             raise RuntimeError("send failed")
         self.sent_messages.append(message)
 
+    async def send_text(self, text: str) -> None:
+        await self.send_json(json.loads(text))
+
 
 @pytest.mark.asyncio
 async def test_broadcast_filters_target_client() -> None:
@@ -48,3 +54,122 @@ async def test_failed_send_removes_connection() -> None:
 
     clients = await broadcaster.list_clients()
     assert clients == []
+
+
+class SlowWebSocket(DummyWebSocket):
+    def __init__(self, gate: asyncio.Event, started: list) -> None:
+        super().__init__()
+        self.gate = gate
+        self.started = started
+
+    async def send_text(self, text: str) -> None:
+        self.started.append(self)
+        await self.gate.wait()
+        await super().send_text(text)
+
+
+@pytest.mark.asyncio
+async def test_broadcast_sends_to_all_targets_concurrently() -> None:
+    broadcaster = RealtimeBroadcaster()
+    gate = asyncio.Event()
+    started: list = []
+    sockets = [SlowWebSocket(gate, started) for _ in range(3)]
+    failing = DummyWebSocket(should_fail=True)
+    for ws in (*sockets, failing):
+        await broadcaster.add_connection(ws)
+
+    task = asyncio.create_task(broadcaster.broadcast({"type": "test", "text": "字幕"}))
+    while len(started) < len(sockets):
+        await asyncio.sleep(0)
+    gate.set()
+    await task
+
+    assert all(ws.sent_messages == [{"type": "test", "text": "字幕"}] for ws in sockets)
+    clients = await broadcaster.list_clients()
+    assert clients == [{"client_id": None, "connections": 3}]
+
+
+@pytest.mark.asyncio
+async def test_reverse_index_tracks_reregistration_and_removal() -> None:
+    broadcaster = RealtimeBroadcaster()
+    ws_one = DummyWebSocket()
+    ws_two = DummyWebSocket()
+    await broadcaster.add_connection(ws_one)
+    await broadcaster.add_connection(ws_two)
+    await broadcaster.register_client(ws_one, "alpha")
+    await broadcaster.register_client(ws_two, "alpha")
+    await broadcaster.register_client(ws_two, "beta")
+
+    await broadcaster.broadcast({"type": "test"}, target_client_id="alpha")
+    assert ws_one.sent_messages == [{"type": "test"}]
+    assert ws_two.sent_messages == []
+
+    await broadcaster.remove_connection(ws_one)
+    assert await broadcaster.list_clients() == [{"client_id": "beta", "connections": 1}]
+
+
+def test_encode_message_matches_send_json_format(monkeypatch) -> None:
+    from app.services import realtime_bus
+
+    message = {"type": "subtitle_update", "subtitle": {"text": "字幕", "duration": 1.5}}
+    expected = json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+    monkeypatch.setattr(realtime_bus, "orjson", None)
+    assert realtime_bus._encode_message(message) == expected
+
+
+@pytest.mark.asyncio
+async def test_send_messages_drops_dead_socket_once() -> None:
+    broadcaster = RealtimeBroadcaster()
+    ws = DummyWebSocket(should_fail=True)
+    await broadcaster.add_connection(ws)
+    removals = []
+    original_remove = broadcaster.remove_connection
+
+    async def counting_remove(websocket) -> None:
+        removals.append(websocket)
+        await original_remove(websocket)
+
+    broadcaster.remove_connection = counting_remove
+
+    await broadcaster.send_messages(ws, [{"type": "a"}, {"type": "b"}, {"type": "c"}])
+
+    assert removals == [ws]
+    assert await broadcaster.list_clients() == []
+
+
+@pytest.mark.asyncio
+async def test_subtitle_and_caption_bursts_send_latest_only(monkeypatch) -> None:
+    from app.services import realtime_bus
+
+    monkeypatch.setattr(realtime_bus, "_COALESCE_DELAY_SECONDS", 0.01)
+    broadcaster = RealtimeBroadcaster()
+    ws = DummyWebSocket()
+    await broadcaster.add_connection(ws)
+
+    for text in ("h", "he", "hey"):
+        await broadcaster.broadcast_subtitle({"text": text})
+    await broadcaster.broadcast_caption({"text": "cap"})
+    assert ws.sent_messages == []
+
+    await asyncio.sleep(0.05)
+
+    assert sorted(ws.sent_messages, key=lambda m: m["type"]) == [
+        {"type": "caption_update", "caption": {"text": "cap"}},
+        {"type": "subtitle_update", "subtitle": {"text": "hey"}},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_broadcast_without_targets_skips_encoding(monkeypatch) -> None:
+    from app.services import realtime_bus
+
+    def fail_encode(message):
+        raise AssertionError("nothing to send, payload should not be encoded")
+
+    monkeypatch.setattr(realtime_bus, "_encode_message", fail_encode)
+    broadcaster = RealtimeBroadcaster()
+
+    await broadcaster.broadcast({"type": "test"})
+    await broadcaster.add_connection(DummyWebSocket())
+    await broadcaster.broadcast({"type": "test"}, target_client_id="offline")
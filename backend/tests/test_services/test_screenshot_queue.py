@@ -41,3 +41,102 @@ async def test_queue_emits_events_via_broadcaster() -> None:
     result = {"filename": "test.png"}
     await queue.mark_completed(record["id"], result, processed_by="alpha")
     assert broadcaster.events == [({"type": "screenshot_completed", "request_id": record["id"]}, "alpha")]
+
+
+@pytest.mark.asyncio
+async def test_reads_do_not_wait_for_the_mutation_lock() -> None:
+    import asyncio
+
+    queue = ScreenshotRequestQueue(broadcaster=None)
+    record = await queue.create_request({})
+
+    async with queue._lock:
+        fetched = await asyncio.wait_for(queue.get_request(record["id"]), timeout=1)
+        pending = await asyncio.wait_for(queue.list_pending_messages(), timeout=1)
+
+    assert fetched == record
+    assert [msg["request_id"] for msg in pending] == [record["id"]]
+
+
+def test_utc_timestamp_formats_once_per_second(monkeypatch) -> None:
+    from datetime import datetime, timezone
+
+    from app.services import screenshot_queue
+
+    monkeypatch.setattr(screenshot_queue, "_ts_cache", (-1, ""))
+    monkeypatch.setattr(screenshot_queue.time, "time", lambda: 1_700_000_000.75)
+
+    first = screenshot_queue._utc_timestamp()
+
+    expected = datetime.fromtimestamp(1_700_000_000, timezone.utc).replace(tzinfo=None).isoformat() + "Z"
+    assert first == expected
+    assert screenshot_queue._utc_timestamp() is first
+
+
+@pytest.mark.asyncio
+async def test_pending_index_drops_finished_requests() -> None:
+    queue = ScreenshotRequestQueue(broadcaster=None)
+    done = await queue.create_request({})
+    failed = await queue.create_request({})
+    waiting = await queue.create_request({})
+
+    await queue.mark_completed(done["id"], {"filename": "a.png"})
+    await queue.mark_failed(failed["id"], "boom")
+
+    pending = await queue.list_pending_messages()
+    assert [msg["request_id"] for msg in pending] == [waiting["id"]]
+    assert list(queue._pending_ids) == [waiting["id"]]
+
+
+@pytest.mark.asyncio
+async def test_finished_requests_are_evicted_by_cap_and_ttl(monkeypatch) -> None:
+    from app.services import screenshot_queue
+
+    monkeypatch.setattr(screenshot_queue, "_MAX_FINISHED_REQUESTS", 2)
+    queue = ScreenshotRequestQueue(broadcaster=None)
+    records = [await queue.create_request({}) for _ in range(3)]
+    for record in records:
+        await queue.mark_completed(record["id"], {})
+
+    assert await queue.get_request(records[0]["id"]) is None
+    assert await queue.get_request(records[2]["id"]) is not None
+
+    monkeypatch.setattr(screenshot_queue, "_FINISHED_TTL_SECONDS", -1.0)
+    pending = await queue.create_request({})
+
+    assert list(queue._requests) == [pending["id"]]
+
+
+@pytest.mark.asyncio
+async def test_records_are_returned_as_dicts_with_sound_effect_once_attached() -> None:
+    queue = ScreenshotRequestQueue(broadcaster=None)
+    created = await queue.create_request({"client_id": "alpha"})
+
+    assert set(created) == {
+        "id", "status", "created_at", "updated_at", "metadata",
+        "result", "error", "target_client_id", "processed_by",
+    }
+    assert "sound_effect" not in await queue.get_request(created["id"])
+
+    await queue.attach_sound_effect(created["id"], {"filename": "s.wav"})
+
+    assert (await queue.get_request(created["id"]))["sound_effect"] == {"filename": "s.wav"}
+
+
+@pytest.mark.asyncio
+async def test_pending_replay_reuses_prebuilt_message() -> None:
+    broadcaster = StubBroadcaster()
+    queue = ScreenshotRequestQueue(broadcaster=broadcaster)
+    created = await queue.create_request({"client_id": "alpha", "note": "x"})
+
+    first = await queue.list_pending_messages("alpha")
+    second = await queue.list_pending_messages("alpha")
+
+    assert first[0] is second[0]
+    assert first[0] is broadcaster.events[0][0]
+    assert first[0] == {
+        "type": "screenshot_request",
+        "request_id": created["id"],
+        "metadata": {"client_id": "alpha", "note": "x"},
+        "target_client_id": "alpha",
+    }
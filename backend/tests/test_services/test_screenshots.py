@@ -0,0 +1,68 @@
+"""Tests for screenshot persistence helpers."""
+
+import os
+import tempfile
+
+import pytest
+
+from app.services import screenshots
+
+
+PAYLOAD = os.urandom(3 * (1 << 20) + 123)
+
+
+def _spooled(rolled: bool) -> tempfile.SpooledTemporaryFile:
+    src = tempfile.SpooledTemporaryFile(max_size=len(PAYLOAD) + (0 if rolled else 1))
+    src.write(PAYLOAD)
+    if rolled:
+        src.rollover()
+    src.seek(0)
+    return src
+
+
+@pytest.mark.parametrize("rolled", [True, False])
+def test_copy_upload_copies_disk_and_memory_spools(tmp_path, rolled):
+    src = _spooled(rolled)
+    target = tmp_path / "out.png"
+
+    with target.open("wb") as dst:
+        screenshots._copy_upload(src, dst)
+
+    assert target.read_bytes() == PAYLOAD
+    # 記憶體中的上傳檔不應被強制寫到磁碟
+    assert (src.name is not None) is rolled
+
+
+def test_copy_upload_handles_objects_without_file_descriptor(monkeypatch, tmp_path):
+    import io
+
+    calls = []
+    monkeypatch.setattr(
+        screenshots.os, "copy_file_range", lambda *args: calls.append(args) or 0, raising=False
+    )
+    target = tmp_path / "out.png"
+
+    with target.open("wb") as dst:
+        screenshots._copy_upload(io.BytesIO(PAYLOAD), dst)
+
+    assert target.read_bytes() == PAYLOAD
+    assert calls == []
+
+
+def test_copy_upload_falls_back_when_kernel_copy_fails(monkeypatch, tmp_path):
+    calls = []
+
+    def failing_copy_file_range(src_fd, dst_fd, count):
+        calls.append(count)
+        if len(calls) > 1:
+            raise OSError("EXDEV")
+        return os.write(dst_fd, b"partial")
+
+    monkeypatch.setattr(screenshots.os, "copy_file_range", failing_copy_file_range, raising=False)
+    target = tmp_path / "out.png"
+
+    with target.open("wb") as dst:
+        screenshots._copy_upload(_spooled(True), dst)
+
+    assert len(calls) == 2
+    assert target.read_bytes() == PAYLOAD
@@ -0,0 +1,110 @@
+"""Tests for the ElevenLabs sound effect helper."""
+
+import hashlib
+import json
+import os
+import stat
+
+import httpx
+import pytest
+
+from app.services import sound_effects
+from app.utils import http_client
+
+
+@pytest.fixture
+def sound_env(monkeypatch, tmp_path):
+    sounds_dir = tmp_path / "generated_sounds"
+    monkeypatch.setattr(sound_effects.settings, "elevenlabs_api_key", "test-key")
+    monkeypatch.setattr(sound_effects.settings, "generated_sounds_dir", str(sounds_dir))
+    monkeypatch.setattr(sound_effects.settings, "metadata_dir", str(tmp_path / "metadata"))
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=b"fake mp3 bytes")
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(http_client, "_client", client)
+    yield sounds_dir
+    client.close()
+
+
+def test_generate_sound_effect_records_size_and_checksum(sound_env, tmp_path):
+    result = sound_effects.generate_sound_effect(prompt="rain", image_path="shots/scene.png")
+
+    expected = hashlib.sha256(b"fake mp3 bytes").hexdigest()
+    assert result["filename"] == "scene.mp3"
+    assert result["size_bytes"] == len(b"fake mp3 bytes")
+    assert result["checksum_sha256"] == expected
+    assert (sound_env / "scene.mp3").read_bytes() == b"fake mp3 bytes"
+    stored = json.loads((tmp_path / "metadata" / "scene.mp3.json").read_text(encoding="utf-8"))
+    assert stored["checksum_sha256"] == expected
+
+
+@pytest.mark.skipif(not hasattr(os, "fchmod"), reason="POSIX file modes only")
+def test_generated_sound_is_world_readable(sound_env):
+    result = sound_effects.generate_sound_effect(prompt="rain", image_path="scene.png")
+
+    # 音檔由靜態路由提供，不可沿用 mkstemp 的 0600
+    assert stat.S_IMODE(os.stat(result["absolute_path"]).st_mode) == 0o644
+
+
+def test_generate_sound_effect_keeps_existing_file(sound_env):
+    sound_env.mkdir(parents=True, exist_ok=True)
+    (sound_env / "scene.mp3").write_bytes(b"older")
+
+    result = sound_effects.generate_sound_effect(prompt="rain", image_path="scene.png")
+
+    assert result["filename"] != "scene.mp3"
+    assert (sound_env / "scene.mp3").read_bytes() == b"older"
+    assert (sound_env / result["filename"]).read_bytes() == b"fake mp3 bytes"
+
+
+def test_shared_http_client_is_reused_and_recreated_after_close(monkeypatch):
+    monkeypatch.setattr(http_client, "_client", None)
+
+    first = http_client.get_http_client()
+    assert http_client.get_http_client() is first
+
+    http_client.close_http_client()
+    assert first.is_closed
+    second = http_client.get_http_client()
+    assert second is not first
+    http_client.close_http_client()
+
+
+def test_generate_sound_effect_sends_encoded_json_body(sound_env, monkeypatch):
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(200, content=b"audio")
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(http_client, "_client", client)
+
+    sound_effects.generate_sound_effect(prompt=" 雨聲 ", image_path="scene.png", loop=True)
+
+    request = seen[0]
+    assert json.loads(request.content) == {
+        "text": "雨聲",
+        "model_id": sound_effects.DEFAULT_MODEL_ID,
+        "loop": True,
+    }
+    assert request.headers["xi-api-key"] == "test-key"
+    assert request.headers["content-type"] == "application/json"
+    assert "xi-api-key" not in sound_effects._STATIC_HEADERS
+    client.close()
+
+
+def test_generate_sound_effect_error_leaves_no_files(sound_env, monkeypatch):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(500, text="upstream down")
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(http_client, "_client", client)
+
+    with pytest.raises(RuntimeError, match="upstream down"):
+        sound_effects.generate_sound_effect(prompt="rain", image_path="scene.png")
+
+    assert list(sound_env.iterdir()) == []
+    client.close()
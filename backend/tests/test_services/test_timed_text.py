@@ -22,6 +22,9 @@ class FakeClock:
     def __call__(self) -> datetime:
         return self._value
 
+    def monotonic(self) -> float:
+        return self._value.timestamp()
+
 
 @pytest.mark.asyncio
 async def test_subtitle_uses_default_duration(monkeypatch: pytest.MonkeyPatch) -> None:
@@ -85,6 +88,7 @@ async def test_expired_entries_are_cleared(
 ) -> None:
     clock = FakeClock(datetime(2024, 7, 1, tzinfo=timezone.utc))
     monkeypatch.setattr(timed_text_module, "_now", clock)
+    monkeypatch.setattr(timed_text_module, "_monotonic", clock.monotonic)
 
     manager = manager_factory()
     setter = getattr(manager, setter_name)
@@ -96,3 +100,52 @@ async def test_expired_entries_are_cleared(
     assert await getter() is None
     # 再次查詢也應該保持為 None（狀態已清除）
     assert await getter() is None
+
+
+@pytest.mark.asyncio
+async def test_timestamps_are_formatted_once_per_state(monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = FakeClock(datetime(2024, 8, 1, tzinfo=timezone.utc))
+    monkeypatch.setattr(timed_text_module, "_now", clock)
+    calls = []
+    original = timed_text_module._to_iso
+
+    def counting(dt):
+        calls.append(dt)
+        return original(dt)
+
+    monkeypatch.setattr(timed_text_module, "_to_iso", counting)
+    manager = SubtitleManager()
+    await manager.set_subtitle("hello")
+    formatted = len(calls)
+
+    for _ in range(3):
+        payload = await manager.get_subtitle()
+
+    assert len(calls) == formatted
+    assert payload["expires_at"] == "2024-08-01T00:00:30Z"
+
+
+def test_timed_text_state_is_frozen_with_prebuilt_payload() -> None:
+    now = datetime(2024, 9, 1, tzinfo=timezone.utc)
+    state = timed_text_module.TimedTextState("hi", None, None, None, now)
+
+    assert state.to_payload() is state.to_payload()
+    assert not hasattr(state, "__dict__")
+    with pytest.raises(AttributeError):
+        state.text = "changed"
+
+
+@pytest.mark.asyncio
+async def test_get_text_checks_expiry_without_building_datetimes(monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = FakeClock(datetime(2024, 10, 1, tzinfo=timezone.utc))
+    monkeypatch.setattr(timed_text_module, "_monotonic", clock.monotonic)
+    manager = SubtitleManager()
+    await manager.set_subtitle("hello", duration_seconds=5, target_client_id="c1")
+
+    def fail_now() -> datetime:
+        raise AssertionError("get_text should not call _now")
+
+    monkeypatch.setattr(timed_text_module, "_now", fail_now)
+    assert (await manager.get_subtitle("c1"))["text"] == "hello"
+    clock.advance(5)
+    assert await manager.get_subtitle("c1") is None
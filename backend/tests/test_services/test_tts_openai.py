@@ -0,0 +1,61 @@
+"""Tests for OpenAI TTS helpers."""
+
+import re
+from pathlib import Path
+
+import pytest
+
+from app.services import tts_openai
+
+
+def _reference_sanitize(name):
+    if not name:
+        return ""
+    cleaned = Path(str(name)).name.replace("\x00", "")
+    cleaned = re.sub(r"[^A-Za-z0-9._-]", "_", cleaned).lstrip(".")
+    return cleaned[:120]
+
+
+@pytest.mark.parametrize(
+    "name",
+    [None, "", "narration_01", "../etc/passwd", ".hidden", "旁白 one", "a\x00b", "x" * 200, "..."],
+)
+def test_sanitize_base_filename_matches_regex_version(name):
+    assert tts_openai._sanitize_base_filename(name) == _reference_sanitize(name)
+
+
+def test_synthesize_speech_retries_without_instructions_and_streams_to_disk(monkeypatch, tmp_path):
+    import hashlib
+    import json
+
+    import httpx
+
+    from app.utils import http_client
+
+    sounds_dir = tmp_path / "sounds"
+    monkeypatch.setattr(tts_openai.settings, "openai_api_key", "test-key")
+    monkeypatch.setattr(tts_openai.settings, "generated_sounds_dir", str(sounds_dir))
+    monkeypatch.setattr(tts_openai.settings, "metadata_dir", str(tmp_path / "metadata"))
+    bodies = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        bodies.append(body)
+        if "instructions" in body:
+            return httpx.Response(400, text="Unknown field: instructions")
+        return httpx.Response(200, content=b"spoken audio")
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(http_client, "_client", client)
+
+    result = tts_openai.synthesize_speech_openai(
+        text="你好", instructions="calm", filename_base="greeting"
+    )
+
+    assert [("instructions" in body) for body in bodies] == [True, False]
+    assert result["filename"] == "greeting.mp3"
+    assert result["size_bytes"] == len(b"spoken audio")
+    assert result["checksum_sha256"] == hashlib.sha256(b"spoken audio").hexdigest()
+    assert (sounds_dir / "greeting.mp3").read_bytes() == b"spoken audio"
+    assert list(sounds_dir.glob("*.part")) == []
+    client.close()
@@ -22,41 +22,116 @@ def _create_files(names: List[str]) -> None:
         (offspring_dir / name).write_bytes(b"test")
 
 
-def test_sweep_and_index_offspring_structure(monkeypatch):
+class FakeCollection:
+    def __init__(self, existing: List[str] | None = None) -> None:
+        self.existing = set(existing or [])
+        self.get_calls: List[List[str]] = []
+        self.upserts: List[List[str]] = []
+
+    def get(self, ids, include=None):
+        self.get_calls.append(list(ids))
+        return {"ids": [i for i in ids if i in self.existing]}
+
+    def upsert(self, ids, embeddings, metadatas, documents=None):
+        assert len(ids) == len(embeddings) == len(metadatas)
+        self.upserts.append(list(ids))
+        self.existing.update(ids)
+
+
+@pytest.fixture(autouse=True)
+def _no_jitter(monkeypatch):
+    monkeypatch.setattr(vector_store, "_EMBED_JITTER_SECONDS", 0)
+
+
+@pytest.fixture
+def fake_collection(monkeypatch):
+    col = FakeCollection()
+    monkeypatch.setattr(vector_store, "get_images_collection", lambda: col)
+    return col
+
+
+def _fake_compute(name: str):
+    return name, [0.1, 0.2], {"path": name}
+
+
+def test_sweep_and_index_offspring_structure(monkeypatch, fake_collection):
     _create_files(["b.jpg", "a.png", "ignore.txt"])
+    fake_collection.existing = {"b.jpg"}
 
     calls = []
 
-    def fake_index(name: str, *, force: bool):
-        calls.append((name, force))
-        status = "indexed" if name == "a.png" else "exists"
-        return {"id": name, "status": status}
+    def fake_compute(name: str):
+        calls.append(name)
+        return _fake_compute(name)
 
-    monkeypatch.setattr(vector_store, "index_offspring_image", fake_index)
+    monkeypatch.setattr(vector_store, "_compute_vec_and_meta", fake_compute)
 
-    result = vector_store.sweep_and_index_offspring(force=True)
+    result = vector_store.sweep_and_index_offspring()
 
     assert result == {
         "indexed": 1,
         "skipped": 1,
         "errors": 0,
         "results": [
-            {"id": "a.png", "status": "indexed"},
+            {"id": "a.png", "status": "indexed", "dim": 2},
             {"id": "b.jpg", "status": "exists"},
         ],
     }
-    assert calls == [("a.png", True), ("b.jpg", True)]
+    assert calls == ["a.png"]
+    assert fake_collection.get_calls == [["a.png", "b.jpg"]]
+    assert fake_collection.upserts == [["a.png"]]
+
+
+def test_sweep_force_skips_existing_lookup(monkeypatch, fake_collection):
+    _create_files(["b.jpg", "a.png"])
+    fake_collection.existing = {"b.jpg"}
+    monkeypatch.setattr(vector_store, "_compute_vec_and_meta", _fake_compute)
+
+    result = vector_store.sweep_and_index_offspring(force=True)
+
+    assert result["indexed"] == 2
+    assert fake_collection.get_calls == []
+    assert sorted(fake_collection.upserts[0]) == ["a.png", "b.jpg"]
+
+
+def test_index_files_flushes_in_batches(monkeypatch, fake_collection):
+    _create_files([f"{i}.png" for i in range(5)])
+    monkeypatch.setattr(vector_store, "_compute_vec_and_meta", _fake_compute)
+    monkeypatch.setattr(vector_store, "_UPSERT_BATCH_SIZE", 2)
+
+    result = vector_store.sweep_and_index_offspring()
+
+    assert result["indexed"] == 5
+    assert fake_collection.get_calls == [["0.png", "1.png"], ["2.png", "3.png"], ["4.png"]]
+    assert [len(batch) for batch in fake_collection.upserts] == [2, 2, 1]
+    assert sorted(sum(fake_collection.upserts, [])) == [f"{i}.png" for i in range(5)]
+
+
+def test_failed_flush_marks_batch_as_errors(monkeypatch, fake_collection):
+    _create_files(["a.png", "b.png"])
+    monkeypatch.setattr(vector_store, "_compute_vec_and_meta", _fake_compute)
 
+    def broken_upsert(**kwargs):
+        raise RuntimeError("db locked")
 
-def test_index_offspring_batch_structure(monkeypatch):
+    monkeypatch.setattr(fake_collection, "upsert", broken_upsert)
+
+    result = vector_store.sweep_and_index_offspring()
+
+    assert result["indexed"] == 0
+    assert result["errors"] == 2
+    assert result["results"][0] == {"id": "a.png", "status": "error", "error": "db locked"}
+
+
+def test_index_offspring_batch_structure(monkeypatch, fake_collection):
     _create_files(["b.jpg", "c.jpeg", "a.png"])
 
-    def fake_index(name: str, *, force: bool):
+    def fake_compute(name: str):
         if name == "b.jpg":
             raise RuntimeError("boom")
-        return {"id": name, "status": "indexed"}
+        return _fake_compute(name)
 
-    monkeypatch.setattr(vector_store, "index_offspring_image", fake_index)
+    monkeypatch.setattr(vector_store, "_compute_vec_and_meta", fake_compute)
 
     result = vector_store.index_offspring_batch(batch_size=2, offset=1)
 
@@ -65,7 +140,7 @@ def test_index_offspring_batch_structure(monkeypatch):
     assert result["errors"] == 1
     assert result["results"] == [
         {"id": "b.jpg", "status": "error", "error": "boom"},
-        {"id": "c.jpeg", "status": "indexed"},
+        {"id": "c.jpeg", "status": "indexed", "dim": 2},
     ]
     assert result["batch_info"] == {
         "batch_size": 2,
@@ -73,3 +148,65 @@ def test_index_offspring_batch_structure(monkeypatch):
         "total_files": 3,
         "next_offset": 3,
     }
+
+
+def test_embeddings_run_concurrently_and_keep_file_order(monkeypatch, fake_collection):
+    import threading
+
+    names = [f"{i}.png" for i in range(4)]
+    _create_files(names)
+    barrier = threading.Barrier(4, timeout=5)
+
+    def fake_compute(name: str):
+        # 四個呼叫必須同時在途才能通過 barrier
+        barrier.wait()
+        return _fake_compute(name)
+
+    monkeypatch.setattr(vector_store, "_compute_vec_and_meta", fake_compute)
+
+    result = vector_store.sweep_and_index_offspring()
+
+    assert [r["id"] for r in result["results"]] == names
+    assert result["indexed"] == 4
+
+
+def test_offspring_listing_is_cached_until_directory_changes(monkeypatch, _isolated_offspring_dir):
+    _create_files(["b.png", "a.png", "notes.txt"])
+    (_isolated_offspring_dir / "sub.png").mkdir()
+    stat = _isolated_offspring_dir.stat()
+    # 目錄 mtime 早於掃描時間，清單才會被沿用
+    vector_store.os.utime(_isolated_offspring_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10_000_000_000))
+
+    first = vector_store._iter_offspring_images()
+    assert [p.name for p in first] == ["a.png", "b.png"]
+
+    scans = []
+    real_scandir = vector_store.os.scandir
+
+    def counting_scandir(path):
+        scans.append(path)
+        return real_scandir(path)
+
+    monkeypatch.setattr(vector_store.os, "scandir", counting_scandir)
+    assert vector_store._iter_offspring_images() is first
+    assert [p.name for p in vector_store._iter_offspring_images(limit=1)] == ["a.png"]
+    assert scans == []
+
+    _create_files(["c.JPG"])
+    stat = _isolated_offspring_dir.stat()
+    # 保證 mtime 前進（部分檔案系統時間解析度較粗）
+    vector_store.os.utime(_isolated_offspring_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert [p.name for p in vector_store._iter_offspring_images()] == ["a.png", "b.png", "c.JPG"]
+    assert len(scans) == 1
+
+
+def test_offspring_listing_sees_file_created_within_same_mtime_tick(_isolated_offspring_dir):
+    _create_files(["a.png"])
+    stat = _isolated_offspring_dir.stat()
+    assert [p.name for p in vector_store._iter_offspring_images()] == ["a.png"]
+
+    _create_files(["b.png"])
+    # 模擬目錄 mtime 未前進（時間解析度較粗的檔案系統）
+    vector_store.os.utime(_isolated_offspring_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert [p.name for p in vector_store._iter_offspring_images()] == ["a.png", "b.png"]
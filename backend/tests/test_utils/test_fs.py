@@ -0,0 +1,55 @@
+"""Tests for filesystem helpers."""
+
+import pytest
+
+from app.utils import fs
+
+
+def test_write_file_bytes_truncates_existing_file(tmp_path):
+    target = tmp_path / "out.bin"
+    target.write_bytes(b"x" * 100)
+
+    fs.write_file_bytes(str(target), b"hello")
+
+    assert target.read_bytes() == b"hello"
+
+
+def test_write_file_bytes_fsyncs_when_requested(monkeypatch, tmp_path):
+    synced: list[int] = []
+    monkeypatch.setattr(fs.os, "fsync", lambda fd: synced.append(fd))
+
+    fs.write_file_bytes(str(tmp_path / "a.bin"), b"a")
+    assert synced == []
+
+    fs.write_file_bytes(str(tmp_path / "b.bin"), b"b", fsync=True)
+    assert len(synced) == 1
+
+
+def test_resolved_dir_creates_once_and_caches(monkeypatch, tmp_path):
+    fs.resolved_dir.cache_clear()
+    target = tmp_path / "a" / ".." / "out"
+
+    first = fs.resolved_dir(str(target))
+
+    assert first == (tmp_path / "out").resolve()
+    assert first.is_dir()
+    assert fs.resolved_dir(str(target)) is first
+
+
+def test_create_unique_file_reserves_names_atomically(tmp_path):
+    first = fs.create_unique_file(tmp_path, "scene", ".mp3")
+    second = fs.create_unique_file(tmp_path, "scene", ".mp3")
+
+    assert first == tmp_path / "scene.mp3"
+    assert first.exists() and second.exists()
+    assert second != first
+    assert second.name.startswith("scene_") and second.suffix == ".mp3"
+
+
+def test_create_unique_file_gives_up_after_repeated_collisions(monkeypatch, tmp_path):
+    monkeypatch.setattr(fs.secrets, "token_hex", lambda n: "same")
+    fs.create_unique_file(tmp_path, "scene", ".mp3")
+    fs.create_unique_file(tmp_path, "scene", ".mp3")
+
+    with pytest.raises(RuntimeError):
+        fs.create_unique_file(tmp_path, "scene", ".mp3")
@@ -0,0 +1,54 @@
+"""Tests for metadata helpers."""
+
+import hashlib
+
+import pytest
+
+from app.utils import metadata
+
+
+@pytest.mark.parametrize("use_file_digest", [True, False])
+def test_compute_sha256_matches_hashlib(monkeypatch, tmp_path, use_file_digest):
+    if not use_file_digest:
+        monkeypatch.delattr(hashlib, "file_digest", raising=False)
+    payload = b"abc" * 50_000
+    target = tmp_path / "audio.mp3"
+    target.write_bytes(payload)
+    empty = tmp_path / "empty.mp3"
+    empty.write_bytes(b"")
+
+    assert metadata.compute_sha256(target) == hashlib.sha256(payload).hexdigest()
+    assert metadata.compute_sha256(empty) == hashlib.sha256(b"").hexdigest()
+
+
+def test_commit_output_with_metadata_renames_both_into_place(monkeypatch, tmp_path):
+    import json
+
+    monkeypatch.setattr(metadata.settings, "metadata_dir", str(tmp_path / "meta"))
+    output = tmp_path / "out" / "clip.mp3"
+    output.parent.mkdir()
+    staged = output.parent / "clip.part"
+    staged.write_bytes(b"audio")
+
+    path = metadata.commit_output_with_metadata(
+        staged, output, {"name": "clip"}, base_name="clip.mp3", fsync=True
+    )
+
+    assert output.read_bytes() == b"audio"
+    assert not staged.exists()
+    assert json.loads(open(path, encoding="utf-8").read()) == {"name": "clip"}
+    assert sorted(p.name for p in tmp_path.rglob("*.tmp")) == []
+
+
+def test_commit_output_with_metadata_cleans_up_on_failure(monkeypatch, tmp_path):
+    monkeypatch.setattr(metadata.settings, "metadata_dir", str(tmp_path / "meta"))
+    output = tmp_path / "clip.mp3"
+    staged = tmp_path / "clip.part"
+    staged.write_bytes(b"audio")
+
+    with pytest.raises(TypeError):
+        metadata.commit_output_with_metadata(staged, output, {"bad": object()}, base_name="clip.mp3")
+
+    assert not output.exists()
+    assert not staged.exists()
+    assert list(tmp_path.rglob("*.tmp")) == []
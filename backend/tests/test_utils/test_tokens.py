@@ -0,0 +1,24 @@
+"""Tests for pooled random tokens."""
+
+import re
+
+from app.utils import tokens
+
+
+def test_token_hex4_draws_from_one_pool_and_refills(monkeypatch):
+    draws = []
+
+    def fake_urandom(n):
+        draws.append(n)
+        return bytes(range(256)) * (n // 256)
+
+    monkeypatch.setattr(tokens.os, "urandom", fake_urandom)
+    tokens._reset_pool()
+
+    values = [tokens.token_hex4() for _ in range(tokens._POOL_SIZE // 4 + 1)]
+
+    assert draws == [tokens._POOL_SIZE, tokens._POOL_SIZE]
+    assert values[0] == "00010203"
+    assert values[1] == "04050607"
+    assert all(re.fullmatch(r"[0-9a-f]{8}", v) for v in values)
+    tokens._reset_pool()